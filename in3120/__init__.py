@@ -1,6 +1,8 @@
 # pylint: disable=missing-module-docstring
 # pylint: disable=line-too-long
 
+import importlib
+
 from .corpus import Corpus, InMemoryCorpus, AccessLoggedCorpus
 from .dictionary import Dictionary, InMemoryDictionary
 from .document import Document, InMemoryDocument
@@ -23,12 +25,31 @@ from .posting import Posting
 from .postinglist import PostingList, InMemoryPostingList, CompressedInMemoryPostingList
 from .postingsmerger import PostingsMerger
 from .sieve import Sieve
-from .similaritysearchengine import SimilaritySearchEngine
 from .soundex import Soundex
 from .sparsedocumentvector import SparseDocumentVector
-from .stringfinder import Trie, StringFinder
 from .tokenizer import Tokenizer, SimpleTokenizer, DummyTokenizer, UnigramTokenizer
+from .trie import Trie
 from .variablebytecodec import VariableByteCodec
 from .vectorizer import Vectorizer
 from .wildcardexpander import WildcardExpander
 from .wordleRanker import WordleRanker
+
+# Submodules with heavy third-party dependencies (faiss, spaCy, jinja2) are only imported
+# the first time one of their classes is accessed, so that clients that don't need them
+# don't pay for loading them.
+_LAZY_IMPORTS = {
+    "SimilaritySearchEngine": ".similaritysearchengine",
+    "StringFinder": ".stringfinder",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, Optional, Sequence
 
 from in3120 import Vectorizer, InvertedIndex, Corpus
 
@@ -44,16 +44,36 @@ class Ranker(ABC):
 class WordleRanker(Ranker):
     """
     A ranker optimized for Wordle by scoring based on letter frequency and positional feedback.
+
+    Scores are cosines between the TF-IDF vectors of the guessed term and of the posting's document.
+    The word-to-document-id map and the unit-length vector of every document are built once, or passed in
+    prebuilt, e.g., the rows of a dense (words x letters) matrix, so update() is two lookups and a dot product.
+    Any vectors with a dot() method will do, row i being the vector of document i scaled to unit length.
     """
 
     def __init__(
-        self, corpus: Corpus, inverted_index: InvertedIndex, vectorizer: Vectorizer
+        self,
+        corpus: Corpus,
+        inverted_index: InvertedIndex,
+        vectorizer: Vectorizer,
+        word_ids: Optional[Dict[str, int]] = None,
+        vectors: Optional[Sequence] = None,
     ):
         self._score = 0.0
         self._document_id = None
         self._corpus = corpus
         self._inverted_index = inverted_index
         self._vectorizer = vectorizer
+        if word_ids is None:
+            word_ids = {doc.get_field("body", ""): doc.document_id for doc in corpus}
+        if vectors is None:
+            vectors = [None] * corpus.size()
+            for doc in corpus:
+                vector = vectorizer.from_document(doc, fields=["body"])
+                vector.normalize()
+                vectors[doc.document_id] = vector
+        self._word_ids = word_ids
+        self._vectors = vectors
 
     def reset(self, document_id: int) -> None:
         self._score = 0.0
@@ -61,23 +81,12 @@ class WordleRanker(Ranker):
 
     def update(self, term: str, multiplicity: int, posting: Posting) -> None:
         assert self._document_id is not None
-        doc_id = None
-        ## NOTE: This is not optimal, but how it has to be done due to the limitations of the files
-        for doc in self._corpus:
-            if doc.get_field("body", "") == term:
-                doc_id = doc.document_id
-                break
+        doc_id = self._word_ids.get(term)
         assert doc_id is not None
         if doc_id == posting.document_id:
             return  # Same word, no need to guess twice, big optimization am I right? ;)
 
-        guess_vector = self._vectorizer.from_document(
-            self._corpus.get_document(doc_id), fields=["body"]
-        )
-        target_vector = self._vectorizer.from_document(
-            self._corpus.get_document(posting.document_id), fields=["body"]
-        )
-        self._score += guess_vector.cosine(target_vector)
+        self._score += float(self._vectors[doc_id].dot(self._vectors[posting.document_id]))
 
     def evaluate(self) -> float:
         assert self._document_id is not None
@@ -0,0 +1,54 @@
+from typing import Optional
+
+import numpy as np
+
+from feedbackmatrix import GREEN, STATUSES, YELLOW, FeedbackMatrix, compute_codes, word_letters
+from guessscorer import NUM_PATTERNS
+
+# ties between equally large buckets go to the pattern that reveals the least, fewest greens first, then fewest yellows
+_GREENS = np.array([statuses.count(GREEN) for statuses in STATUSES])
+_YELLOWS = np.array([statuses.count(YELLOW) for statuses in STATUSES])
+
+
+class AbsurdleHost:
+
+    def __init__(self, feedback_matrix: FeedbackMatrix) -> None:
+        """
+        An adversarial Wordle host: there is no target word, instead every guess gets the feedback pattern
+        that keeps the largest bucket of the remaining answers, and only that bucket remains.
+        The game is won once a single answer is left and it is guessed.
+
+        The partition of the remaining answers is one bincount over a row of the feedback matrix,
+        so a whole game costs a few array reads and no per-word Python work.
+        """
+        self.feedback_matrix = feedback_matrix
+        self.remaining = np.arange(len(feedback_matrix.answers), dtype=np.int64)
+
+    def reset(self) -> None:
+        self.remaining = np.arange(len(self.feedback_matrix.answers), dtype=np.int64)
+
+    def _codes(self, guess: str) -> np.ndarray:
+        if guess in self.feedback_matrix.guess_ids:
+            return np.asarray(self.feedback_matrix.get_row(guess))[self.remaining]
+        answers = [self.feedback_matrix.answers[i] for i in self.remaining]
+        return compute_codes(word_letters([guess]), word_letters(answers))[0]
+
+    def respond(self, guess: str) -> int:
+        """
+        Returns the feedback code for the guess and narrows the remaining answers down to its bucket.
+        """
+        codes = self._codes(guess)
+        counts = np.bincount(codes, minlength=NUM_PATTERNS)
+        # np.lexsort sorts by the last key first, so the best pattern ends up last
+        code = int(np.lexsort((-_YELLOWS, -_GREENS, counts))[-1])
+        self.remaining = self.remaining[codes == code]
+        return code
+
+    @property
+    def target_word(self) -> Optional[str]:
+        """
+        The answer, once the host has been forced down to a single one.
+        """
+        if len(self.remaining) != 1:
+            return None
+        return self.feedback_matrix.answers[int(self.remaining[0])]
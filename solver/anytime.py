@@ -0,0 +1,92 @@
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# a tier gets the sorted candidate ids and the time.perf_counter() deadline, and returns a guess,
+# or None if it ran out of time
+Tier = Callable[[np.ndarray, float], Optional[str]]
+
+
+def letter_scores(words: List[str]) -> np.ndarray:
+    """
+    Per word, how many words share each of its distinct letters, summed. A word made of common letters scores high.
+    """
+    frequencies = Counter(c for word in words for c in set(word))
+    return np.array([sum(frequencies[c] for c in set(word)) for word in words], dtype=np.float64)
+
+
+class AnytimeSelector:
+
+    def __init__(
+        self,
+        tiers: List[Tuple[str, Tier]],
+        budget: float,
+        hook: Optional[Callable[[dict], None]] = None,
+        costs: Optional[Dict[str, Dict[int, float]]] = None,
+    ) -> None:
+        """
+        Picks a guess within a latency budget by running tiers of increasingly expensive scoring, cheapest first.
+        The first tier always runs and should take microseconds. Every later tier replaces the guess if it
+        finishes before the deadline, and is skipped if its last run suggests it wouldn't.
+
+        After every move, hook (if any) gets a report dict:
+            "tier": the tier that produced the guess, "elapsed": seconds, "budget": seconds,
+            "candidates": number of candidates, "timings": seconds per tier that ran, in order,
+            "skipped": tiers that were predicted not to fit in the remaining time
+
+        costs keeps the tier timings that predict the skips. Selectors given the same dict, e.g. every GameSession
+        of a WordleModel, learn them together.
+        """
+        self.tiers = tiers
+        self.budget = budget
+        self.hook = hook
+        self.last_report = None
+        # tier -> size class -> seconds of its last run, candidate counts are grouped by n.bit_length()
+        self._costs: Dict[str, Dict[int, float]] = {} if costs is None else costs
+        for name, _ in tiers:
+            self._costs.setdefault(name, {})
+
+    def _predicted_cost(self, name: str, n: int, floor: float) -> float:
+        # the last run for as many candidates, or else for fewer candidates, doubled per size class,
+        # and never less than floor, the time the tier before it took, as tiers get more expensive
+        # a copy, as selectors on other threads may be adding to it
+        costs = dict(self._costs[name])
+        size_class = n.bit_length()
+        smaller = [c for c in costs if c <= size_class]
+        if not smaller:
+            return floor
+        closest = max(smaller)
+        return max(floor, costs[closest] * 2 ** (size_class - closest))
+
+    def select(self, candidate_ids: np.ndarray) -> Optional[str]:
+        start = time.perf_counter()
+        deadline = start + self.budget
+        n = len(candidate_ids)
+        guess, tier = None, None
+        timings, skipped = {}, []
+        previous = 0.0
+        for i, (name, run) in enumerate(self.tiers):
+            now = time.perf_counter()
+            if i > 0 and now + self._predicted_cost(name, n, previous) > deadline:
+                skipped.append(name)
+                continue
+            result = run(candidate_ids, deadline if i > 0 else float("inf"))
+            timings[name] = previous = time.perf_counter() - now
+            # a run that timed out still took at least this long
+            self._costs[name][n.bit_length()] = timings[name]
+            if result is not None:
+                guess, tier = result, name
+
+        self.last_report = {
+            "tier": tier,
+            "elapsed": time.perf_counter() - start,
+            "budget": self.budget,
+            "candidates": n,
+            "timings": timings,
+            "skipped": skipped,
+        }
+        if self.hook is not None:
+            self.hook(self.last_report)
+        return guess
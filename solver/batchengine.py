@@ -0,0 +1,84 @@
+import numpy as np
+
+from context import in3120
+from feedbackmatrix import GRAY, GREEN, STATUSES, YELLOW
+
+# feedback code -> (length,) statuses, so a batch of codes is decoded with a single gather
+STATUS_TABLE = np.array(STATUSES, dtype=np.uint8)
+
+
+def pack(mask: np.ndarray) -> np.ndarray:
+    # bit j of byte b is word 8 * b + j
+    return np.packbits(mask, axis=-1, bitorder="little")
+
+
+class BatchSearchEngine:
+
+    def __init__(self, corpus: in3120.Corpus) -> None:
+        """
+        The rules of SolverSearchEngine/BitsetSearchEngine.get_possible_matches(), applied to a whole batch of games at once.
+
+        Like BitsetIndex, every constraint is a precomputed bitset over word ids, here packed into a row of bytes,
+        so that the state of many games is a (games x bytes) matrix and a turn for all of them is a few
+        gathers and ANDs of whole matrices. Letters are stored as their offset from 'a', so words are expected to be lowercase a-z.
+        """
+        words = [document.get_field("body", "") for document in corpus]
+        self.num_words = len(words)
+        letters = self.encode(words)
+        counts = np.zeros((len(words), 26), dtype=np.uint8)
+        np.add.at(counts, (np.arange(len(words))[:, None], letters), 1)
+
+        alphabet = np.arange(26)[None, :, None]
+        # (position, letter) -> words with that letter at that position
+        self.at_position = pack(letters.T[:, None, :] == alphabet)
+        # (letter, n) -> words with at least n copies of that letter, for n up to one more than the word length
+        self.at_least = pack(counts.T[:, None, :] >= np.arange(letters.shape[1] + 2)[None, :, None])
+        self.all_bits = pack(np.ones(len(words), dtype=bool))
+
+    @staticmethod
+    def encode(words) -> np.ndarray:
+        return np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), -1) - ord("a")
+
+    def new_games(self, num_games: int) -> np.ndarray:
+        return np.tile(self.all_bits, (num_games, 1))
+
+    def unpack(self, bits: np.ndarray) -> np.ndarray:
+        """
+        (games x bytes) bitsets -> (games x words) booleans.
+        """
+        return np.unpackbits(bits, axis=-1, count=self.num_words, bitorder="little").astype(bool)
+
+    def get_possible_matches(self, allowed: np.ndarray, guesses: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        allowed is the (games x bytes) state and is updated in place, guesses are (games x length) encoded
+        letters and codes the feedback code of every game. Returns the (games x bytes) candidates.
+        """
+        statuses = STATUS_TABLE[codes]
+        # occurrences in the guess, and gray occurrences, of the letter at each position
+        same_letter = guesses[:, :, None] == guesses[:, None, :]
+        totals = same_letter.sum(axis=2)
+        grays = (same_letter & (statuses == GRAY)[:, None, :]).sum(axis=2)
+
+        candidates = allowed.copy()
+        for i in range(guesses.shape[1]):
+            letter, status, total, gray = guesses[:, i], statuses[:, i], totals[:, i], grays[:, i]
+            at_position = self.at_position[i, letter]
+
+            # green keeps the letter at this position, yellow (or a repeated gray letter) bans it at this position,
+            # a single gray letter bans it everywhere
+            green = status == GREEN
+            banned_here = (status == YELLOW) | ((status == GRAY) & (total > 1))
+            banned_everywhere = (status == GRAY) & (total == 1)
+            allowed[green] &= at_position[green]
+            allowed[banned_here] &= ~at_position[banned_here]
+            allowed[banned_everywhere] &= ~self.at_least[letter[banned_everywhere], 1]
+
+            # letter count check for the letters of the latest feedback that aren't gray
+            at_least = status != GRAY
+            exactly = at_least & (gray > 0)
+            at_least &= gray == 0
+            candidates[at_least] &= self.at_least[letter[at_least], total[at_least]]
+            n = (total - gray)[exactly]
+            candidates[exactly] &= self.at_least[letter[exactly], n] & ~self.at_least[letter[exactly], n + 1]
+
+        return candidates & allowed
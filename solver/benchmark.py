@@ -0,0 +1,508 @@
+import contextlib
+import io
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from context import in3120
+from bitsetengine import BitsetSearchEngine
+from feedbackmatrix import FeedbackMatrix
+from solverengine import SolverSearchEngine
+from stats import percentile
+from trieengine import TrieSearchEngine
+from wordleinvertedindex import WordleInvertedIndex
+
+"""
+Micro benchmarks for the solver, run from the solver directory:
+    python benchmark.py [name ...]
+Without names, every benchmark is run.
+"""
+
+
+def report(name: str, samples) -> None:
+    print(
+        f"{name:>24}: mean {statistics.mean(samples) * 1000:8.3f} ms"
+        f"  p50 {percentile(samples, 50) * 1000:8.3f} ms"
+        f"  p99 {percentile(samples, 99) * 1000:8.3f} ms"
+        f"  ({len(samples)} samples)"
+    )
+
+
+def bench_filtering(num_games: int = 200, seed: int = 0) -> None:
+    """
+    Per-guess latency of get_possible_matches for the posting-merge, bitset and trie engines.
+    Plays the same games with all of them, and checks that they agree on every turn.
+    """
+    corpus = in3120.InMemoryCorpus(filenames="answer-words.txt")
+    words = [document.get_field("body", "") for document in corpus]
+    matrix = FeedbackMatrix.from_files()
+    targets = random.Random(seed).sample(words, min(num_games, len(words)))
+
+    timings = {SolverSearchEngine: [], BitsetSearchEngine: [], TrieSearchEngine: []}
+    indexes = {engine: engine.build_index(corpus) for engine in timings}
+    for target in targets:
+        engines = {engine: engine(corpus, set(words), index=indexes[engine]) for engine in timings}
+        guess = "slate"
+        for _ in range(6):
+            code = matrix.get_code(guess, target)
+            results = []
+            for engine_class, engine in engines.items():
+                st = time.perf_counter()
+                results.append(engine.get_possible_matches(code, guess))
+                timings[engine_class].append(time.perf_counter() - st)
+            assert all(result == results[0] for result in results), (target, guess)
+            if not results[0] or guess == target:
+                break
+            guess = words[results[0][0]]
+
+    print("=== get_possible_matches per guess ===")
+    for engine_class, samples in timings.items():
+        report(engine_class.__name__, samples)
+
+
+def bench_reset(num_games: int = 1000) -> None:
+    """
+    Cost of WordleSolver.reset, i.e., of starting a new game on top of the shared index.
+    """
+    from wordlesolver import WordleSolver
+
+    print("=== WordleSolver.reset ===")
+    for engine_class in (SolverSearchEngine, BitsetSearchEngine):
+        solver = WordleSolver(engine_class=engine_class)
+        samples = []
+        for _ in range(num_games):
+            st = time.perf_counter()
+            solver.reset("crane")
+            samples.append(time.perf_counter() - st)
+        report(engine_class.__name__, samples)
+
+
+def bench_index(repeats: int = 10) -> None:
+    """
+    Build time, memory and serialized size of WordleInvertedIndex for both word lists.
+    """
+    print("=== WordleInvertedIndex ===")
+    for filename in ("answer-words.txt", "valid-words.txt"):
+        corpus = in3120.InMemoryCorpus(filenames=filename)
+        builds = []
+        for _ in range(repeats):
+            st = time.perf_counter()
+            WordleInvertedIndex(corpus)
+            builds.append(time.perf_counter() - st)
+
+        tracemalloc.start()
+        index = WordleInvertedIndex(corpus)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        data = index.to_bytes()
+        loads = []
+        for _ in range(repeats):
+            st = time.perf_counter()
+            WordleInvertedIndex.from_bytes(corpus, data)
+            loads.append(time.perf_counter() - st)
+
+        print(f"{filename}: {corpus.size()} words, {memory / 1024:.0f} KiB in memory, {len(data) / 1024:.0f} KiB serialized")
+        report("build", builds)
+        report("from_bytes", loads)
+
+
+def bench_solve_many(strategy: str = "cosine") -> None:
+    """
+    A loop over WordleSolver.solve against one solve_many call, for all answer words, without the opening book.
+    """
+    from wordlesolver import WordleSolver
+
+    solver = WordleSolver(engine_class=BitsetSearchEngine, strategy=strategy, use_opening_book=False)
+    words = [document.get_field("body", "") for document in solver.corpus]
+
+    st = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        looped = []
+        for word in words:
+            solver.reset(word)
+            looped.append(solver.solve())
+    loop_time = time.perf_counter() - st
+
+    st = time.perf_counter()
+    batched = solver.solve_many(words)
+    batch_time = time.perf_counter() - st
+
+    assert looped == batched
+    print(f"=== {len(words)} games, strategy={strategy} ===")
+    print(f"{'loop over solve':>24}: {loop_time:8.3f} s")
+    print(f"{'solve_many':>24}: {batch_time:8.3f} s")
+
+
+def bench_absurdle(max_attempts: int = 12) -> None:
+    """
+    One adversarial game per strategy, without the opening book, so every guess is computed live.
+    """
+    from wordlesolver import WordleSolver
+
+    print("=== Absurdle game ===")
+    for strategy in ("cosine", "entropy", "expected_size"):
+        solver = WordleSolver(engine_class=BitsetSearchEngine, strategy=strategy, use_opening_book=False)
+        st = time.perf_counter()
+        solver.reset_adversarial()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = solver.solve(max_attempts)
+        outcome = f"{result['attempts']} attempts" if result["success"] else "not solved"
+        print(f"{strategy:>24}: {time.perf_counter() - st:8.3f} s, {outcome}, answer {solver.host.target_word}")
+
+
+def bench_anytime(num_games: int = 200, seed: int = 0) -> None:
+    """
+    guess_word latency under a per-move latency budget, and which tier of the anytime selector produced the guesses.
+    """
+    from collections import Counter
+
+    from wordlesolver import WordleSolver
+
+    words = in3120.InMemoryCorpus(filenames="answer-words.txt")
+    targets = random.Random(seed).sample([document.get_field("body", "") for document in words], num_games)
+    print(f"=== anytime guess_word, {num_games} games ===")
+    for strategy, budget in (("entropy", 0.005), ("entropy", 0.03), ("entropy", 0.2), ("lookahead", 0.05)):
+        reports = []
+        solver = WordleSolver(
+            engine_class=BitsetSearchEngine, strategy=strategy, use_opening_book=False,
+            latency_budget=budget, timing_hook=reports.append,
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = []
+            for target in targets:
+                solver.reset(target)
+                results.append(solver.solve())
+        solved = [r["attempts"] for r in results if r["success"]]
+        tiers = Counter(report["tier"] for report in reports)
+        report(f"{strategy} {budget * 1000:.0f} ms", [r["elapsed"] for r in reports])
+        print(f"{'':>24}  solved {len(solved)}/{num_games}, mean attempts {statistics.mean(solved):.3f}, tiers {dict(tiers)}")
+
+
+def bench_sampled(repeats: int = 5, seed: int = 0) -> None:
+    """
+    SampledEntropyScorer against exact EntropyScorer scoring: time per guess, the entropy lost by the approximate guess
+    (regret, in bits) and the sample size, for random candidate sets of growing size, the same without the feedback
+    matrix, and for whole games.
+    """
+    import numpy as np
+
+    from guessscorer import EntropyScorer
+    from sampledscorer import SampledEntropyScorer
+    from wordlesolver import WordleSolver
+
+    matrix = FeedbackMatrix.from_files()
+    scorer = EntropyScorer(matrix)
+    scorer.best_guess(np.arange(len(matrix.answers)))  # page the matrix in
+    rng = np.random.default_rng(seed)
+    print("=== sampled vs exact entropy ===")
+    for target_error in (0.1, 0.15, 0.2):
+        sampled = SampledEntropyScorer(matrix.guesses, matrix.answers, scorer, target_error=target_error)
+        for n in (512, 1024, len(matrix.answers)):
+            exact_times, sampled_times, regrets, sizes = [], [], [], []
+            for _ in range(repeats):
+                candidate_ids = np.sort(rng.choice(len(matrix.answers), n, replace=False))
+                st = time.perf_counter()
+                entropies = scorer.entropies(candidate_ids)
+                exact_times.append(time.perf_counter() - st)
+                st = time.perf_counter()
+                guess = sampled.best_guess(candidate_ids)
+                sampled_times.append(time.perf_counter() - st)
+                regrets.append(entropies.max() - entropies[matrix.guess_ids[guess]])
+                sizes.append(sampled.last_sample_size)
+            print(
+                f"target {target_error:.2f} bits, {n:>4} candidates: exact {statistics.mean(exact_times) * 1000:7.1f} ms"
+                f"  sampled {statistics.mean(sampled_times) * 1000:7.1f} ms  regret {statistics.mean(regrets):.4f} bits"
+                f"  sample {statistics.mean(sizes):.0f}"
+            )
+
+    # without the matrix, every code the scorer reads is computed on the fly, as for lexicons too large for one
+    on_the_fly = SampledEntropyScorer(matrix.guesses, matrix.answers)
+    with_matrix = SampledEntropyScorer(matrix.guesses, matrix.answers, scorer)
+    for n in (64, 512, len(matrix.answers)):
+        times, agree = [], 0
+        for _ in range(repeats):
+            candidate_ids = np.sort(rng.choice(len(matrix.answers), n, replace=False))
+            on_the_fly.rng, with_matrix.rng = np.random.default_rng(seed), np.random.default_rng(seed)
+            st = time.perf_counter()
+            guess = on_the_fly.best_guess(candidate_ids)
+            times.append(time.perf_counter() - st)
+            agree += guess == with_matrix.best_guess(candidate_ids)
+        print(
+            f"without the matrix, {n:>4} candidates: {statistics.mean(times) * 1000:7.1f} ms,"
+            f" same guess as with it {agree}/{repeats}"
+        )
+
+    words = [document.get_field("body", "") for document in in3120.InMemoryCorpus(filenames="answer-words.txt")]
+    targets = random.Random(seed).sample(words, 200)
+    for approximate in (False, True):
+        # the opener is guessed against all answers, so the first live guess scores the largest set
+        solver = WordleSolver(engine_class=BitsetSearchEngine, strategy="entropy", use_opening_book=False, approximate=approximate)
+        solver.opener = "qajaq"
+        st = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = []
+            for target in targets:
+                solver.reset(target)
+                results.append(solver.solve())
+        solved = [r["attempts"] for r in results if r["success"]]
+        print(
+            f"{'sampled' if approximate else 'exact':>8} games: {time.perf_counter() - st:6.2f} s for {len(targets)},"
+            f" solved {len(solved)}, mean attempts {statistics.mean(solved):.3f}"
+        )
+
+
+def bench_parallel(repeats: int = 5, max_workers: int = 0) -> None:
+    """
+    ParallelScorer scaling: time per best guess for all answers and for a quarter of them, with 1 to max_workers
+    processes (by default one per core), against the single-process EntropyScorer.
+    """
+    import os
+
+    import numpy as np
+
+    from guessscorer import EntropyScorer
+    from parallelscorer import ParallelScorer
+
+    matrix = FeedbackMatrix.from_files()
+    scorer = EntropyScorer(matrix)
+    candidate_sets = {n: np.arange(0, len(matrix.answers), step) for n, step in (("all", 1), ("quarter", 4))}
+    print(f"=== parallel scoring, {os.cpu_count()} cores ===")
+    for name, candidate_ids in candidate_sets.items():
+        scorer.best_guess(candidate_ids)  # page the matrix in
+        samples = []
+        for _ in range(repeats):
+            st = time.perf_counter()
+            scorer.best_guess(candidate_ids)
+            samples.append(time.perf_counter() - st)
+        report(f"{name} single process", samples)
+    baseline = {}
+    for workers in range(1, (max_workers or os.cpu_count() or 1) + 1):
+        with ParallelScorer(matrix, workers) as parallel:
+            for name, candidate_ids in candidate_sets.items():
+                parallel.best_guess(candidate_ids)  # start the workers
+                samples = []
+                for _ in range(repeats):
+                    st = time.perf_counter()
+                    parallel.best_guess(candidate_ids)
+                    samples.append(time.perf_counter() - st)
+                baseline.setdefault(name, statistics.mean(samples))
+                report(f"{name} {workers} workers ({baseline[name] / statistics.mean(samples):.2f}x)", samples)
+
+
+def bench_ranker(num_guesses: int = 5, seed: int = 0) -> None:
+    """
+    Document-at-a-time ranking of every answer word against a guess with WordleRanker: with the solver's prebuilt
+    word ids and word matrix, with the sparse vectors it builds itself, and with a corpus scan for the guess's id
+    and a from_document() vector pair per posting, as it used to.
+    """
+    from context import in3120
+    from wordlesolver import WordleSolver
+
+    solver = WordleSolver(use_opening_book=False)
+    guesses = random.Random(seed).sample(solver.words, num_guesses)
+    postings = [in3120.Posting(i, 1) for i in range(len(solver.words))]
+    vectorizer = solver.vectorizer
+
+    def rank(ranker, guess):
+        scores = []
+        for posting in postings:
+            ranker.reset(posting.document_id)
+            ranker.update(guess, 1, posting)
+            scores.append(ranker.evaluate())
+        return scores
+
+    def from_document_cosine(guess, posting):
+        guess_id = next(doc.document_id for doc in solver.corpus if doc.get_field("body", "") == guess)
+        guess_vector = vectorizer.from_document(solver.corpus.get_document(guess_id), fields=["body"])
+        target_vector = vectorizer.from_document(solver.corpus.get_document(posting.document_id), fields=["body"])
+        return guess_vector.cosine(target_vector)
+
+    print(f"=== WordleRanker, {len(postings)} documents per guess ===")
+    rankers = {}
+    for name, build in (
+        ("prebuilt", solver.ranker),
+        ("sparse", lambda: in3120.WordleRanker(solver.corpus, solver.invertedindex, vectorizer)),
+    ):
+        st = time.perf_counter()
+        rankers[name] = build()
+        print(f"{name} ranker built in {(time.perf_counter() - st) * 1000:.1f} ms")
+
+    results = {}
+    for name, ranker in rankers.items():
+        samples = []
+        for guess in guesses:
+            st = time.perf_counter()
+            results[name, guess] = rank(ranker, guess)
+            samples.append(time.perf_counter() - st)
+        report(f"{name} per guess", samples)
+    # scanning for the doc id and vectorizing per posting is too slow for every answer, time a slice and scale it up
+    samples = []
+    for guess in guesses:
+        st = time.perf_counter()
+        for posting in postings[:100]:
+            from_document_cosine(guess, posting)
+        samples.append((time.perf_counter() - st) * len(postings) / 100)
+    report("from_document per guess", samples)
+    worst = max(abs(a - b) for guess in guesses for a, b in zip(results["prebuilt", guess], results["sparse", guess]))
+    print(f"largest score difference prebuilt vs sparse: {worst:.2e}")
+
+
+def bench_sessions(num_sessions: int = 200, num_games: int = 400, threads: int = 4, seed: int = 0) -> None:
+    """
+    GameSessions on a shared WordleModel: memory per extra concurrent game, after the first guess and after two turns,
+    next to a whole WordleSolver, and games played from a thread pool, checked against playing them one by one.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from wordlesolver import WordleModel, WordleSolver
+
+    for name, engine_class in (("posting", SolverSearchEngine), ("bitset", BitsetSearchEngine)):
+        tracemalloc.start()
+        WordleSolver(engine_class=engine_class)
+        solver_memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        model = WordleModel(engine_class=engine_class)
+        targets = random.Random(seed).sample(model.words, num_sessions)
+        tracemalloc.start()
+        sessions = [model.new_session(target) for target in targets]
+        started, _ = tracemalloc.get_traced_memory()
+        for session in sessions:
+            for _ in range(2):
+                code = session.get_feedback_code(session.guess)
+                session.filter_candidates(code, session.guess)
+                session.guess = session.guess_word() or session.guess
+        played, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{name}: WordleSolver {solver_memory / 1024:.0f} KiB, per extra session {started / num_sessions / 1024:.1f} KiB"
+            f" new, {played / num_sessions / 1024:.1f} KiB after two turns"
+        )
+
+    model = WordleModel(engine_class=BitsetSearchEngine)
+    targets = random.Random(seed).choices(model.words, k=num_games)
+
+    def play(target):
+        return model.new_session(target).solve()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        st = time.perf_counter()
+        expected = [play(target) for target in targets]
+        sequential = time.perf_counter() - st
+        with ThreadPoolExecutor(threads) as pool:
+            st = time.perf_counter()
+            results = list(pool.map(play, targets))
+            threaded = time.perf_counter() - st
+    print(
+        f"{num_games} games: {sequential:.2f} s one by one, {threaded:.2f} s on {threads} threads,"
+        f" {'same' if results == expected else 'DIFFERENT'} results"
+    )
+
+
+STARTUP_SCRIPT = """
+import sys, time
+st = time.perf_counter()
+import context
+imported = time.perf_counter()
+from wordlesolver import WordleSolver
+solver_imported = time.perf_counter()
+WordleSolver()
+print(imported - st, solver_imported - imported, time.perf_counter() - solver_imported, ",".join(m for m in ("faiss", "spacy", "jinja2") if m in sys.modules))
+"""
+
+
+def bench_startup(repeats: int = 5, import_budget: float = 0.25) -> None:
+    """
+    Start-up cost in fresh processes: importing in3120, importing the solver modules, and then constructing a WordleSolver.
+    Fails if in3120 pulls in its heavy optional dependencies again, or if the import gets slower than the budget.
+    """
+    imports, solver_imports, solvers = [], [], []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], capture_output=True, text=True, check=True).stdout.split(" ")
+        imports.append(float(output[0]))
+        solver_imports.append(float(output[1]))
+        solvers.append(float(output[2]))
+        heavy = output[3].strip()
+        assert not heavy, f"import in3120 loaded {heavy}"
+
+    print("=== start-up, fresh process ===")
+    report("import in3120", imports)
+    report("import wordlesolver", solver_imports)
+    report("WordleSolver()", solvers)
+    assert statistics.median(imports) < import_budget, f"import in3120 is over the {import_budget * 1000:.0f} ms budget"
+
+
+def bench_frequency(num_games: int = 200, seed: int = 0) -> None:
+    """
+    Per-turn cost of the frequency strategy's letter tables: recounted with numpy as GameSession does, and with
+    a Python loop over the candidates, checked to agree on every turn, and the cost of picking the best candidate.
+    """
+    from collections import Counter
+
+    import numpy as np
+
+    from feedbackmatrix import SOLVED
+    from wordlesolver import WordleSolver
+
+    solver = WordleSolver(engine_class=BitsetSearchEngine, strategy="frequency", use_opening_book=False)
+    frequencies = solver.letter_frequencies.copy()
+    targets = random.Random(seed).sample(solver.words, min(num_games, len(solver.words)))
+    timings = {"numpy recount": [], "python recount": [], "best": []}
+    for target in targets:
+        solver.reset(target)
+        guess = solver.guess
+        for _ in range(6):
+            code = solver.get_feedback_code(guess)
+            if code == SOLVED:
+                break
+            solver.filter_candidates(code, guess)
+            candidates = solver.candidates
+
+            st = time.perf_counter()
+            frequencies.recount(candidates)
+            timings["numpy recount"].append(time.perf_counter() - st)
+            st = time.perf_counter()
+            positional, presence = Counter(), Counter()
+            for i in candidates:
+                word = solver.words[i]
+                positional.update(enumerate(word))
+                presence.update(set(word))
+            timings["python recount"].append(time.perf_counter() - st)
+            for (position, c), count in positional.items():
+                assert frequencies.positional[position, ord(c) - ord("a")] == count, (target, guess)
+            assert all(frequencies.presence[ord(c) - ord("a")] == count for c, count in presence.items()), (target, guess)
+
+            st = time.perf_counter()
+            guess = solver.guess_word()
+            timings["best"].append(time.perf_counter() - st)
+            if guess is None:
+                break
+
+    print(f"=== Letter frequency tables, {len(targets)} games ===")
+    for name, samples in timings.items():
+        report(name, samples)
+
+
+BENCHMARKS = {
+    "filtering": bench_filtering,
+    "reset": bench_reset,
+    "index": bench_index,
+    "solve_many": bench_solve_many,
+    "absurdle": bench_absurdle,
+    "anytime": bench_anytime,
+    "sampled": bench_sampled,
+    "parallel": bench_parallel,
+    "ranker": bench_ranker,
+    "sessions": bench_sessions,
+    "startup": bench_startup,
+    "frequency": bench_frequency,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
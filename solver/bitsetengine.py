@@ -0,0 +1,151 @@
+import struct
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from context import in3120
+from feedbackmatrix import GRAY, GREEN, STATUSES, YELLOW
+
+"""
+Serialized form of a BitsetIndex, all integers little-endian:
+    header:  magic b"WBI1" | number of words (uint32) | number of bitsets (uint32)
+    bitset:  kind (b"p" position, b"c" count) | letter (1 ascii byte) | position or count (uint8) | bitset ((words + 7) // 8 bytes)
+"""
+
+MAGIC = b"WBI1"
+HEADER = struct.Struct("<4sII")
+ENTRY = struct.Struct("<ccB")
+
+
+class BitsetIndex:
+
+    def __init__(
+        self,
+        corpus: in3120.Corpus,
+        position_bits: Optional[Dict[Tuple[str, int], int]] = None,
+        count_bits: Optional[Dict[Tuple[str, int], int]] = None,
+    ) -> None:
+        """
+        Precomputed bitsets over the word ids of a corpus (a Python int, bit i set means word i matches).
+        Read-only once built, so a single index can be shared by every game.
+        Pass the bitsets, e.g., from from_bytes(), to skip building.
+        """
+        self.size = corpus.size()
+        self.all_bits = (1 << self.size) - 1
+        self.position_bits: Dict[Tuple[str, int], int] = {}  # (letter, pos) -> words with letter at pos
+        self.count_bits: Dict[Tuple[str, int], int] = {}  # (letter, n) -> words with at least n copies of letter
+        if position_bits is not None and count_bits is not None:
+            self.position_bits, self.count_bits = position_bits, count_bits
+            return
+        for document in corpus:
+            w = document.get_field("body", "")
+            bit = 1 << document.document_id
+            for pos, c in enumerate(w):
+                self.position_bits[(c, pos)] = self.position_bits.get((c, pos), 0) | bit
+            for c, n in Counter(w).items():
+                for k in range(1, n + 1):
+                    self.count_bits[(c, k)] = self.count_bits.get((c, k), 0) | bit
+
+    def to_bytes(self) -> bytes:
+        width = (self.size + 7) // 8
+        chunks = [HEADER.pack(MAGIC, self.size, len(self.position_bits) + len(self.count_bits))]
+        for kind, bitsets in ((b"p", self.position_bits), (b"c", self.count_bits)):
+            for (letter, n), bits in sorted(bitsets.items()):
+                chunks.append(ENTRY.pack(kind, letter.encode("ascii"), n))
+                chunks.append(bits.to_bytes(width, "little"))
+        return b"".join(chunks)
+
+    @staticmethod
+    def from_bytes(corpus: in3120.Corpus, data: bytes) -> "BitsetIndex":
+        magic, size, count = HEADER.unpack_from(data)
+        assert magic == MAGIC and size == corpus.size(), "not a serialized BitsetIndex for this corpus"
+        width = (size + 7) // 8
+        bitsets = {b"p": {}, b"c": {}}
+        offset = HEADER.size
+        for _ in range(count):
+            kind, letter, n = ENTRY.unpack_from(data, offset)
+            offset += ENTRY.size
+            bitsets[kind][(letter.decode("ascii"), n)] = int.from_bytes(data[offset:offset + width], "little")
+            offset += width
+        return BitsetIndex(corpus, bitsets[b"p"], bitsets[b"c"])
+
+    def at_position(self, letter: str, pos: int) -> int:
+        return self.position_bits.get((letter, pos), 0)
+
+    def at_least(self, letter: str, n: int) -> int:
+        if n <= 0:
+            return self.all_bits
+        return self.count_bits.get((letter, n), 0)
+
+    def exactly(self, letter: str, n: int) -> int:
+        return self.at_least(letter, n) & ~self.at_least(letter, n + 1)
+
+
+class BitsetSearchEngine:
+
+    def __init__(
+        self,
+        corpus: in3120.Corpus,
+        wordlist: set[str],
+        debug: bool = False,
+        index: Optional[BitsetIndex] = None,
+    ) -> None:
+        """
+        Drop-in alternative to SolverSearchEngine that gives the same results from get_possible_matches(),
+        but keeps every constraint as a bitset over word ids.
+
+        Instead of pruning posting lists and doing a 5-out-of-N merge, a feedback becomes a handful of
+        AND/ANDNOT operations on the precomputed bitsets of a shared BitsetIndex.
+        The only per-game state is the allowed bitset, so creating an engine for a new game is almost free.
+        """
+        self._corpus = corpus
+        self.wordlist = wordlist
+        self.debug = debug
+        self.index = index if index is not None else self.build_index(corpus)
+        # words that survived all the positional constraints seen so far, like the pruned posting lists do
+        self.allowed = self.index.all_bits
+
+    @staticmethod
+    def build_index(corpus: in3120.Corpus) -> BitsetIndex:
+        return BitsetIndex(corpus)
+
+    @staticmethod
+    def load_index(corpus: in3120.Corpus, data: bytes) -> BitsetIndex:
+        return BitsetIndex.from_bytes(corpus, data)
+
+    def _update_allowed(self, code: int, guess: str) -> None:
+        # same rules as SolverSearchEngine._update_index, green keeps the letter at that position,
+        # yellow (or a repeated gray letter) bans it at that position, a single gray letter bans it everywhere
+        for i, (c, status) in enumerate(zip(guess, STATUSES[code])):
+            if status == GREEN:
+                self.allowed &= self.index.at_position(c, i)
+            elif status == YELLOW or guess.count(c) > 1:
+                self.allowed &= ~self.index.at_position(c, i)
+            else:
+                self.allowed &= ~self.index.at_least(c, 1)
+
+    def _letter_count_bits(self, code: int, guess: str) -> int:
+        # the letter count check from SolverSearchEngine._is_in_range, only for the latest feedback
+        statuses = STATUSES[code]
+        result = self.index.all_bits
+        checked = ""
+        for c, status in zip(guess, statuses):
+            if status == GRAY or c in checked:
+                continue
+            checked += c
+            grays = sum(1 for d, n in zip(guess, statuses) if d == c and n == GRAY)
+            if grays == 0:
+                result &= self.index.at_least(c, guess.count(c))
+            else:
+                result &= self.index.exactly(c, guess.count(c) - grays)
+        return result
+
+    @staticmethod
+    def to_ids(bits: int) -> List[int]:
+        return [i for i, b in enumerate(reversed(bin(bits))) if b == "1"]
+
+    def get_possible_matches(self, code: int, guess: str) -> List[int]:
+        # should be called after every step of the wordler solver, with the feedback code of the guess
+        self._update_allowed(code, guess)
+        result = self.to_ids(self.allowed & self._letter_count_bits(code, guess))
+        if self.debug: print(result)
+        return result
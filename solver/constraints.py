@@ -0,0 +1,77 @@
+from typing import Dict, Iterable, List, Tuple
+
+from feedbackmatrix import GRAY, GREEN, STATUSES, WORD_LENGTH, YELLOW
+
+ALL_LETTERS = (1 << 26) - 1
+
+# per position, a bitmask of the letters still allowed there (bit 0 is 'a'),
+# and per letter, the (min, max) number of times it can occur
+Signature = Tuple[Tuple[int, ...], Tuple[Tuple[int, int], ...]]
+
+
+def _bit(c: str) -> int:
+    return 1 << (ord(c) - ord("a"))
+
+
+def allowed_letters(mask: int) -> str:
+    return "".join(chr(ord("a") + j) for j in range(26) if mask >> j & 1)
+
+
+def narrow_positions(masks: List[int], guess: str, code: int) -> List[int]:
+    """
+    The per-position allowed-letter masks after a feedback: green keeps the letter at its position,
+    yellow (or a gray copy of a repeated letter) bans it there, and a single gray letter is banned everywhere.
+    """
+    masks = list(masks)
+    for i, (c, status) in enumerate(zip(guess, STATUSES[code])):
+        if status == GREEN:
+            masks[i] &= _bit(c)
+        elif status == YELLOW or guess.count(c) > 1:
+            masks[i] &= ~_bit(c)
+        else:
+            masks = [mask & ~_bit(c) for mask in masks]
+    return masks
+
+
+def letter_bounds(guess: str, code: int) -> Dict[str, Tuple[int, int]]:
+    """
+    The (min, max) counts a feedback gives the letters of the guess: the non-gray copies of a letter give its
+    minimum count, or its exact count if one of its copies is gray. Letters that are all gray are left out,
+    narrow_positions() takes care of them.
+    """
+    statuses = STATUSES[code]
+    bounds = {}
+    for c in set(guess):
+        copies = [status for d, status in zip(guess, statuses) if d == c]
+        found = sum(1 for status in copies if status != GRAY)
+        if found:
+            bounds[c] = (found, found if GRAY in copies else WORD_LENGTH)
+    return bounds
+
+
+def constraint_signature(history: Iterable[Tuple[str, int]]) -> Signature:
+    """
+    The constraints a history of (guess, feedback code) pairs puts on the answer, in a canonical form, so that
+    histories that reach the same constraints in a different order, or through different guesses, get equal signatures.
+
+    The rules are those of narrow_positions() and letter_bounds(), which the engines and
+    WordleSolver.filter_candidates apply, so equal signatures mean equal candidate sets.
+    """
+    masks = [ALL_LETTERS] * WORD_LENGTH
+    bounds = [[0, WORD_LENGTH] for _ in range(26)]
+    for guess, code in history:
+        masks = narrow_positions(masks, guess, code)
+        for c, (low, high) in letter_bounds(guess, code).items():
+            letter = bounds[ord(c) - ord("a")]
+            letter[0], letter[1] = max(letter[0], low), min(letter[1], high)
+
+    # the same constraints can be spelled differently: a letter allowed nowhere can't occur, a letter that can't occur
+    # is allowed nowhere, and a letter occurs at least as often as the positions it is fixed at
+    for j, letter in enumerate(bounds):
+        bit = 1 << j
+        if letter[1] == 0:
+            masks = [mask & ~bit for mask in masks]
+        allowed = sum(1 for mask in masks if mask & bit)
+        fixed = sum(1 for mask in masks if mask == bit)
+        letter[0], letter[1] = max(letter[0], fixed), min(letter[1], allowed)
+    return tuple(masks), tuple((low, high) for low, high in bounds)
@@ -0,0 +1,205 @@
+import os
+from hashlib import sha1
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+"""
+Feedback codes:
+    a feedback pattern is stored as a base-3 number where position i contributes status * 3**i,
+    with the same statuses as WordleSolver.get_feedback: 0 gray, 1 yellow, 2 green.
+    All five letters green is 2 * (1 + 3 + 9 + 27 + 81) = 242, so every pattern fits in a uint8.
+The solver and the engines pass these codes around instead of lists of (letter, status) tuples,
+decode_feedback() is only needed to show a pattern to a person.
+"""
+
+GRAY, YELLOW, GREEN = 0, 1, 2
+WORD_LENGTH = 5
+SOLVED = 242
+# code -> the status of every position, precomputed so that nothing has to be decoded per turn
+STATUSES = [tuple(code // 3**i % 3 for i in range(WORD_LENGTH)) for code in range(3**WORD_LENGTH)]
+
+
+def read_words(filename: str) -> List[str]:
+    with open(filename, "r") as f:
+        return f.read().split()
+
+
+def wordlist_hash(*wordlists: List[str]) -> str:
+    """
+    Fingerprint of one or more word lists, used to tell when cached data built from them is stale.
+    """
+    digest = sha1()
+    for words in wordlists:
+        digest.update("\n".join(words).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def encode_feedback(feedback) -> int:
+    # [('c', '2'), ('a', '0'), ('r', '1'), ('e', '0'), ('s', '2')] -> 2 + 0*3 + 1*9 + 0*27 + 2*81
+    code = 0
+    for i, (_, status) in enumerate(feedback):
+        code += int(status) * 3**i
+    return code
+
+
+def score_guess(guess: str, answer: str) -> int:
+    """
+    The feedback code for a guess against an answer, for pairs that aren't in a FeedbackMatrix.
+    Greens are matched first, then the remaining letters of the answer are consumed left to right by yellows.
+    """
+    code = 0
+    unmatched = [a for g, a in zip(guess, answer) if g != a]
+    for i, (g, a) in enumerate(zip(guess, answer)):
+        if g == a:
+            code += GREEN * 3**i
+        elif g in unmatched:
+            code += YELLOW * 3**i
+            unmatched.remove(g)
+    return code
+
+
+def decode_feedback(guess: str, code: int) -> List[Tuple[str, str]]:
+    feedback = []
+    for letter in guess:
+        feedback.append((letter, str(code % 3)))
+        code //= 3
+    return feedback
+
+
+def word_letters(words: List[str]) -> np.ndarray:
+    # one row per word, one uint8 letter per column
+    return np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), -1)
+
+
+def code_dtype(word_length: int) -> type:
+    # the smallest unsigned type that holds every one of the 3**word_length patterns
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if 3**word_length <= np.iinfo(dtype).max + 1:
+            return dtype
+    return np.uint64
+
+
+def compute_codes(guesses: np.ndarray, answers: np.ndarray) -> np.ndarray:
+    """
+    Vectorized get_feedback for every pair of (G x L) guesses and (A x L) answers, returns a (G x A) matrix,
+    of uint8 for words of up to 5 letters, see code_dtype() for longer ones.
+
+    A letter that isn't green is yellow iff the answer has more unmatched copies of it
+    than there are earlier non-green copies of it in the guess, which is the same left-to-right
+    consumption that get_feedback does.
+    """
+    g = guesses[:, None, :]
+    a = answers[None, :, :]
+    green = g == a
+    dtype = code_dtype(guesses.shape[1])
+    codes = np.zeros(green.shape[:2], dtype=dtype)
+    used = np.zeros(green.shape[:2], dtype=np.uint8)
+
+    for i in range(guesses.shape[1]):
+        letter = g[:, :, i, None]
+        available = ((a == letter) & ~green).sum(axis=2, dtype=np.uint8)
+        used[...] = 0
+        for j in range(i):
+            used += (g[:, :, j] == g[:, :, i]) & ~green[:, :, j]
+        yellow = ~green[:, :, i] & (used < available)
+        codes += (2 * green[:, :, i] + yellow).astype(dtype) * dtype(3**i)
+    return codes
+
+
+class FeedbackMatrix:
+    """
+    The feedback pattern of every (guess, answer) pair, precomputed as a (guesses x answers) uint8 matrix.
+
+    The matrix is built in chunks of guesses, saved as a .npy file next to the word lists and
+    memory-mapped on later runs, so looking up a pattern is a single array read, and processes share the pages.
+    The file name carries a hash of both word lists, so editing a list triggers a rebuild.
+    The answer-major copy, codes_by_answer, gets a .npy file of its own in the same way.
+    """
+
+    def __init__(
+        self,
+        guesses: List[str],
+        answers: List[str],
+        directory: Optional[str] = None,
+        chunk_size: int = 512,
+    ) -> None:
+        assert len(set(len(w) for w in guesses + answers)) == 1, "all words must have the same length"
+        assert len(guesses[0]) <= 5, "patterns for words longer than 5 letters don't fit in a uint8"
+        self.guesses = guesses
+        self.answers = answers
+        self.guess_ids = {w: i for i, w in enumerate(guesses)}
+        self.answer_ids = {w: i for i, w in enumerate(answers)}
+        self.chunk_size = chunk_size
+        self.path = None
+        self.by_answer_path = None
+        if directory is not None:
+            key = wordlist_hash(guesses, answers)
+            self.path = os.path.join(directory, f"feedback-{key}.npy")
+            self.by_answer_path = os.path.join(directory, f"feedback-{key}-by-answer.npy")
+        self.codes = self._load_or_build(self.path, (len(guesses), len(answers)), self.build)
+        self._codes_by_answer = None
+
+    @staticmethod
+    def from_files(
+        guesses_filename: str = "valid-words.txt",
+        answers_filename: str = "answer-words.txt",
+    ) -> "FeedbackMatrix":
+        return FeedbackMatrix(
+            read_words(guesses_filename),
+            read_words(answers_filename),
+            directory=os.path.dirname(guesses_filename) or ".",
+        )
+
+    @staticmethod
+    def _load_or_build(path: Optional[str], shape: Tuple[int, int], build: Callable[[], np.ndarray]) -> np.ndarray:
+        if path is not None and os.path.exists(path):
+            codes = np.load(path, mmap_mode="r")
+            if codes.shape == shape:
+                return codes
+
+        codes = build()
+        if path is not None:
+            # write to a temporary file first, so concurrent processes never map a half-written matrix
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, codes)
+            os.replace(tmp_path, path)
+            return np.load(path, mmap_mode="r")
+        return codes
+
+    @property
+    def codes_by_answer(self) -> np.ndarray:
+        """
+        The same codes as an (answers x guesses) matrix, so the codes of a set of candidates are contiguous rows.
+        Made on first use and memory-mapped like codes, rather than transposed into private memory by every process.
+        """
+        if self._codes_by_answer is None:
+            shape = (len(self.answers), len(self.guesses))
+            self._codes_by_answer = self._load_or_build(
+                self.by_answer_path, shape, lambda: np.ascontiguousarray(self.codes.T)
+            )
+        return self._codes_by_answer
+
+    def build(self) -> np.ndarray:
+        guesses = word_letters(self.guesses)
+        answers = word_letters(self.answers)
+        codes = np.empty((len(self.guesses), len(self.answers)), dtype=np.uint8)
+        for start in range(0, len(self.guesses), self.chunk_size):
+            stop = start + self.chunk_size
+            codes[start:stop] = compute_codes(guesses[start:stop], answers)
+        return codes
+
+    def __contains__(self, pair: Tuple[str, str]) -> bool:
+        guess, answer = pair
+        return guess in self.guess_ids and answer in self.answer_ids
+
+    def get_code(self, guess: str, answer: str) -> int:
+        return int(self.codes[self.guess_ids[guess], self.answer_ids[answer]])
+
+    def get_row(self, guess: str) -> np.ndarray:
+        """
+        Codes of one guess against every answer, indexed by answer id.
+        """
+        return self.codes[self.guess_ids[guess]]
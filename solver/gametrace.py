@@ -0,0 +1,228 @@
+import argparse
+import io
+import os
+import struct
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+from feedbackmatrix import WORD_LENGTH
+
+"""
+On-disk format, all integers little-endian, records are appended and never rewritten:
+    header:  magic b"WGT1" | word length n (uint8)
+    record:  game (uint32) | turn (uint8) | source (uint8) | feedback code (uint8) | target (n ascii bytes)
+             | guess (n ascii bytes) | candidates (uint16) | filter time (uint32 us) | rank time (uint32 us)
+One record per turn. The target is zero bytes when it isn't known up front, as against an Absurdle host.
+"""
+
+MAGIC = b"WGT1"
+HEADER = struct.Struct("<4sB")
+
+# where the guess of a turn came from
+OPENER, BOOK, LIVE = 0, 1, 2
+SOURCES = ("opener", "book", "live")
+
+
+def record_struct(word_length: int = WORD_LENGTH) -> struct.Struct:
+    return struct.Struct(f"<IBBB{word_length}s{word_length}sHII")
+
+
+class TraceRecord(NamedTuple):
+    game: int
+    turn: int
+    source: int
+    code: int
+    target: str
+    guess: str
+    candidates: int  # that the guess was chosen from, 0 for opener and book moves, which don't filter
+    filter_time: float  # seconds
+    rank_time: float  # seconds
+
+
+class GameTrace:
+
+    def __init__(self, path: Optional[str] = None, word_length: int = WORD_LENGTH) -> None:
+        """
+        A compact append-only log of solved games, one fixed-size record per turn, see the format above.
+        Appends to the log at path, which is created if needed and continues its game numbering,
+        or without a path, to an in-memory buffer that getvalue() returns.
+        Pass it to WordleSolver(trace=...) to record every game played with solve().
+        """
+        self.path = path
+        self.record = record_struct(word_length)
+        self.file: BinaryIO
+        if path is None:
+            self.file = io.BytesIO()
+            self.file.write(HEADER.pack(MAGIC, word_length))
+            self.next_game = 0
+            return
+
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self.file = open(path, "ab")
+        if size == 0:
+            self.file.write(HEADER.pack(MAGIC, word_length))
+            self.next_game = 0
+            return
+        with open(path, "rb") as f:
+            magic, stored_length = HEADER.unpack(f.read(HEADER.size))
+            assert magic == MAGIC and stored_length == word_length, f"{path} is not a game trace for {word_length}-letter words"
+            # a record cut short by a crash is dropped, the next game starts after the last whole one
+            count = (size - HEADER.size) // self.record.size
+            self.next_game = 0
+            if count:
+                f.seek(HEADER.size + (count - 1) * self.record.size)
+                self.next_game = self.record.unpack(f.read(self.record.size))[0] + 1
+        self.file.truncate(HEADER.size + count * self.record.size)
+
+    def new_game(self) -> int:
+        game = self.next_game
+        self.next_game += 1
+        return game
+
+    def append(
+        self,
+        game: int,
+        turn: int,
+        source: int,
+        code: int,
+        target: Optional[str],
+        guess: str,
+        candidates: int,
+        filter_time: float,
+        rank_time: float,
+    ) -> None:
+        self.file.write(self.record.pack(
+            game,
+            turn,
+            source,
+            code,
+            (target or "").encode("ascii"),
+            guess.encode("ascii"),
+            min(candidates, 0xFFFF),
+            min(int(filter_time * 1e6), 0xFFFFFFFF),
+            min(int(rank_time * 1e6), 0xFFFFFFFF),
+        ))
+
+    def getvalue(self) -> bytes:
+        return self.file.getvalue()
+
+    def close(self) -> None:
+        if self.path is not None:
+            self.file.close()
+
+    def __enter__(self) -> "GameTrace":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_trace(data: bytes) -> Iterator[TraceRecord]:
+    """
+    The records of a trace log, or of GameTrace.getvalue(), in the order they were written.
+    """
+    magic, word_length = HEADER.unpack_from(data)
+    assert magic == MAGIC, "not a game trace"
+    record = record_struct(word_length)
+    for fields in record.iter_unpack(data[HEADER.size:len(data) - (len(data) - HEADER.size) % record.size]):
+        game, turn, source, code, target, guess, candidates, filter_us, rank_us = fields
+        yield TraceRecord(
+            game, turn, source, code, target.rstrip(b"\0").decode("ascii"), guess.decode("ascii"),
+            candidates, filter_us / 1e6, rank_us / 1e6,
+        )
+
+
+def games_of(records: Iterator[TraceRecord]) -> Dict[int, List[TraceRecord]]:
+    games: Dict[int, List[TraceRecord]] = {}
+    for record in records:
+        games.setdefault(record.game, []).append(record)
+    return games
+
+
+def replay(solver, data: bytes, max_attempts: int = 6) -> dict:
+    """
+    Plays the games of a trace log again with solver, and compares them turn by turn.
+    Returns a dict with:
+        "games": games replayed, "skipped": games without a known target,
+        "divergences": (game, turn, logged guess, new guess) for the first turn where every diverging game differs,
+        "turns": turns compared, "logged" / "replayed": filter + rank seconds of every compared turn, in the same order
+    """
+    logged_games = games_of(read_trace(data))
+    solver.trace = GameTrace(word_length=HEADER.unpack_from(data)[1])
+    skipped = []
+    for game, records in logged_games.items():
+        if not records[0].target:
+            skipped.append(game)
+            continue
+        solver.reset(records[0].target)
+        solver.solve(max_attempts)
+    replayed_games = list(games_of(read_trace(solver.trace.getvalue())).values())
+    solver.trace = None
+
+    divergences, logged, replayed = [], [], []
+    compared = [game for game in logged_games if game not in skipped]
+    for game, new in zip(compared, replayed_games):
+        old = logged_games[game]
+        for a, b in zip(old, new):
+            if a.guess != b.guess:
+                divergences.append((game, a.turn, a.guess, b.guess))
+                break
+            logged.append(a.filter_time + a.rank_time)
+            replayed.append(b.filter_time + b.rank_time)
+        else:
+            if len(old) != len(new):
+                divergences.append((game, min(len(old), len(new)), None, None))
+    return {
+        "games": len(compared),
+        "skipped": len(skipped),
+        "divergences": divergences,
+        "turns": len(logged),
+        "logged": logged,
+        "replayed": replayed,
+    }
+
+
+if __name__ == "__main__":
+    import contextlib
+    import random
+    import statistics
+
+    from stats import percentile
+    from bitsetengine import BitsetSearchEngine
+    from wordlesolver import STRATEGIES, WordleSolver
+
+    parser = argparse.ArgumentParser(description="Records games to a trace log, or replays one, run from the solver directory.")
+    parser.add_argument("command", choices=("record", "replay"))
+    parser.add_argument("log")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="cosine")
+    parser.add_argument("--sample", type=int, default=0, help="record: only a seeded sample of this many answer words")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-attempts", type=int, default=6)
+    args = parser.parse_args()
+
+    solver = WordleSolver(engine_class=BitsetSearchEngine, strategy=args.strategy)
+    if args.command == "record":
+        words = [document.get_field("body", "") for document in solver.corpus]
+        if args.sample:
+            words = random.Random(args.seed).sample(words, args.sample)
+        with GameTrace(args.log) as trace, contextlib.redirect_stdout(io.StringIO()):
+            solver.trace = trace
+            for word in words:
+                solver.reset(word)
+                solver.solve(args.max_attempts)
+        print(f"Appended {len(words)} games to {args.log}")
+    else:
+        with open(args.log, "rb") as f:
+            data = f.read()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = replay(solver, data, args.max_attempts)
+        print(f"=== Replay of {args.log}: {result['games']} games, {result['skipped']} skipped, {result['turns']} turns ===")
+        for game, turn, old, new in result["divergences"][:20]:
+            print(f"game {game} turn {turn + 1}: " + (f"'{old}' -> '{new}'" if old else "different number of turns"))
+        print(f"{len(result['divergences'])} diverging games")
+        if result["turns"]:
+            deltas = [b - a for a, b in zip(result["logged"], result["replayed"])]
+            for name, samples in (("logged", result["logged"]), ("replayed", result["replayed"]), ("delta", deltas)):
+                print(
+                    f"{name:>8} per turn: mean {statistics.mean(samples) * 1000:8.3f} ms"
+                    f"  p50 {percentile(samples, 50) * 1000:8.3f} ms  p99 {percentile(samples, 99) * 1000:8.3f} ms"
+                )
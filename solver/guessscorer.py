@@ -0,0 +1,128 @@
+import math
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from feedbackmatrix import FeedbackMatrix
+
+NUM_PATTERNS = 243
+
+
+class EntropyScorer:
+
+    def __init__(self, feedback_matrix: FeedbackMatrix, chunk_size: int = 256) -> None:
+        """
+        Scores every allowed guess by how well it splits the remaining candidates.
+
+        A guess partitions the candidates by the feedback pattern each of them would give.
+        The partition sizes for a chunk of guesses come out of a single bincount over the
+        precomputed feedback codes, from which we get either the expected information (entropy, in bits)
+        or the expected number of candidates left after the guess.
+        """
+        self.feedback_matrix = feedback_matrix
+        self.chunk_size = chunk_size
+        # answer-major, so gathering the candidates' columns reads contiguous rows, memory-mapped and shared
+        self._codes_by_answer = feedback_matrix.codes_by_answer
+        self._answer_guess_ids = np.array(
+            [feedback_matrix.guess_ids.get(w, -1) for w in feedback_matrix.answers], dtype=np.int64
+        )
+        # pattern p of the i-th guess in a chunk goes to bin i * 243 + p
+        self._offsets = np.arange(chunk_size, dtype=np.int32) * NUM_PATTERNS
+        # per bucket size c: c * log2(c) for entropy and c * c for expected size
+        sizes = np.arange(len(feedback_matrix.answers) + 1, dtype=np.float64)
+        self._c_log_c = sizes * np.log2(np.maximum(sizes, 1.0))
+        self._c_squared = sizes * sizes
+
+    def _partition_chunks(self, candidate_ids: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        # chunking the guess pool keeps the bincount output small enough to stay in cache
+        codes = self._codes_by_answer[candidate_ids]
+        num_guesses = codes.shape[1]
+        for start in range(0, num_guesses, self.chunk_size):
+            chunk = codes[:, start:start + self.chunk_size]
+            flat = chunk + self._offsets[:chunk.shape[1]]
+            counts = np.bincount(flat.ravel(), minlength=chunk.shape[1] * NUM_PATTERNS)
+            yield start, counts.reshape(chunk.shape[1], NUM_PATTERNS)
+
+    def partition_counts(self, candidate_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns a (guesses x 243) matrix, entry [g, p] is the number of candidates that would give pattern p for guess g.
+        """
+        return np.concatenate([counts for _, counts in self._partition_chunks(candidate_ids)])
+
+    def candidate_codes(self, candidate_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns a (candidates x guesses) matrix, entry [i, g] is the pattern candidate i would give for guess g.
+        """
+        return self._codes_by_answer[candidate_ids]
+
+    def guess_ids_of(self, candidate_ids: np.ndarray) -> np.ndarray:
+        """
+        The guess id of every candidate answer, -1 for answers that aren't allowed guesses.
+        """
+        return self._answer_guess_ids[candidate_ids]
+
+    def bucket_sums(
+        self, candidate_ids: np.ndarray, tables: List[np.ndarray], deadline: float = math.inf
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        For every guess and every table, the sum of table[c] over the sizes c of the buckets the guess splits
+        the candidates into, as a (tables x guesses) matrix, and the size of the largest bucket of every guess.
+        Returns None if the time.perf_counter() deadline passes first.
+        """
+        sums = np.empty((len(tables), len(self.feedback_matrix.guesses)), dtype=np.float64)
+        largest = np.empty(len(self.feedback_matrix.guesses), dtype=np.int64)
+        for start, counts in self._partition_chunks(candidate_ids):
+            for i, table in enumerate(tables):
+                sums[i, start:start + len(counts)] = table[counts].sum(axis=1)
+            largest[start:start + len(counts)] = counts.max(axis=1)
+            if time.perf_counter() > deadline:
+                return None
+        return sums, largest
+
+    def _bucket_sums(self, candidate_ids: np.ndarray, table: np.ndarray, deadline: float) -> Optional[np.ndarray]:
+        result = self.bucket_sums(candidate_ids, [table], deadline)
+        return None if result is None else result[0][0]
+
+    def entropies(self, candidate_ids: np.ndarray, deadline: float = math.inf) -> Optional[np.ndarray]:
+        # H = log2(n) - sum(c * log2(c)) / n
+        n = len(candidate_ids)
+        sums = self._bucket_sums(candidate_ids, self._c_log_c, deadline)
+        return None if sums is None else np.log2(n) - sums / n
+
+    def expected_sizes(self, candidate_ids: np.ndarray, deadline: float = math.inf) -> Optional[np.ndarray]:
+        # a candidate lands in a bucket of size c with probability c / n
+        sums = self._bucket_sums(candidate_ids, self._c_squared, deadline)
+        return None if sums is None else sums / len(candidate_ids)
+
+    def scores(self, candidate_ids: np.ndarray, criterion: str = "entropy", deadline: float = math.inf) -> Optional[np.ndarray]:
+        """
+        Higher is better for both criteria, expected sizes are negated.
+        Returns None if the time.perf_counter() deadline passes before every guess is scored.
+        """
+        if criterion == "entropy":
+            return self.entropies(candidate_ids, deadline)
+        if criterion == "expected_size":
+            sizes = self.expected_sizes(candidate_ids, deadline)
+            return None if sizes is None else -sizes
+        raise ValueError(f"unknown criterion '{criterion}'")
+
+    def best_guess(self, candidate_ids: np.ndarray, criterion: str = "entropy", deadline: float = math.inf) -> Optional[str]:
+        """
+        Returns the guess that best splits the candidates. Among equally good guesses,
+        one that could itself be the answer is preferred.
+        Returns None if there are no candidates, or if the deadline passes first.
+        """
+        if len(candidate_ids) == 0:
+            return None
+        if len(candidate_ids) <= 2:
+            return self.feedback_matrix.answers[candidate_ids[0]]
+
+        scores = self.scores(candidate_ids, criterion, deadline)
+        if scores is None:
+            return None
+        best = np.flatnonzero(scores >= scores.max() - 1e-9)
+        candidate_guess_ids = self._answer_guess_ids[candidate_ids]
+        best_candidates = np.intersect1d(best, candidate_guess_ids[candidate_guess_ids >= 0])
+        guess_id = best_candidates[0] if len(best_candidates) else best[0]
+        return self.feedback_matrix.guesses[guess_id]
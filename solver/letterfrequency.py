@@ -0,0 +1,71 @@
+from typing import List, Optional
+
+import numpy as np
+
+from feedbackmatrix import WORD_LENGTH
+
+NUM_LETTERS = 26
+
+
+def letter_matrix(words: List[str]) -> np.ndarray:
+    """
+    A (words x WORD_LENGTH) matrix of letter indexes, 0 for 'a', row i is word i.
+    """
+    return np.array([[ord(c) - ord("a") for c in word] for word in words], dtype=np.int64).reshape(-1, WORD_LENGTH)
+
+
+class LetterFrequencies:
+
+    def __init__(self, letters: np.ndarray, ids: Optional[np.ndarray] = None) -> None:
+        """
+        Positional letter frequencies over a set of word ids: how many of the words have each letter at each
+        position, a (WORD_LENGTH x 26) table, and how many of them have each letter anywhere, a 26-entry table.
+        letters is the letter_matrix() of all the words, shared read-only. recount() moves the tables to another
+        set with two bincounts, and a word's score is then a handful of table lookups, see scores().
+        """
+        self.letters = letters
+        # the positions where a letter occurs for the first time in its word, so letters are counted once per word
+        first = np.ones(letters.shape, dtype=bool)
+        for i in range(1, WORD_LENGTH):
+            first[:, i] = (letters[:, :i] != letters[:, i:i + 1]).all(axis=1)
+        self.first = first
+        self.positional = np.zeros((WORD_LENGTH, NUM_LETTERS), dtype=np.int64)
+        self.presence = np.zeros(NUM_LETTERS, dtype=np.int64)
+        self.size = 0
+        if ids is not None:
+            self.recount(ids)
+
+    def copy(self) -> "LetterFrequencies":
+        # shares the per-word matrices, only the tables are per copy
+        other = object.__new__(LetterFrequencies)
+        other.letters, other.first = self.letters, self.first
+        other.positional, other.presence, other.size = self.positional.copy(), self.presence.copy(), self.size
+        return other
+
+    def recount(self, ids: np.ndarray) -> None:
+        letters = self.letters[ids]
+        # letter c at position i goes to bin i * 26 + c
+        positional = np.bincount(
+            (letters + np.arange(WORD_LENGTH) * NUM_LETTERS).ravel(), minlength=WORD_LENGTH * NUM_LETTERS
+        )
+        self.positional = positional.reshape(WORD_LENGTH, NUM_LETTERS)
+        self.presence = np.bincount(letters[self.first[ids]], minlength=NUM_LETTERS)
+        self.size = len(ids)
+
+    def scores(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Per word, the words of the set that share a letter at the same position (would-be greens), plus the words
+        that have each of its distinct letters anywhere. A repeated letter only counts once towards the latter.
+        """
+        letters = self.letters[ids]
+        positional = self.positional[np.arange(WORD_LENGTH), letters].sum(axis=1)
+        presence = np.where(self.first[ids], self.presence[letters], 0).sum(axis=1)
+        return positional + presence
+
+    def best(self, ids: np.ndarray) -> Optional[int]:
+        """
+        The id of the highest scoring word among ids, the first in id order among ties, or None if there are none.
+        """
+        if not len(ids):
+            return None
+        return int(ids[int(np.argmax(self.scores(ids)))])
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import List
+
+from feedbackmatrix import SOLVED, read_words, score_guess
+from stats import percentile
+
+"""
+Load generator for service.py: every client plays whole games against the service over its own connection,
+one request in flight at a time, and the latency of every request is recorded. Run from the solver directory:
+    python loadgen.py --socket /tmp/wordle.sock --spawn
+"""
+
+
+async def play(socket_path: str, targets: List[str], latencies: List[float], attempts: List[int], max_attempts: int) -> None:
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    request_id = 0
+    while targets:
+        target = targets.pop()
+        history = []
+        for _ in range(max_attempts):
+            request_id += 1
+            st = time.perf_counter()
+            writer.write(json.dumps({"id": request_id, "history": history}).encode("utf-8") + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - st)
+            assert response["id"] == request_id and "error" not in response, response
+            if response["guess"] is None:
+                break
+            code = score_guess(response["guess"], target)
+            history.append([response["guess"], code])
+            if code == SOLVED:
+                attempts.append(len(history))
+                break
+    writer.close()
+    await writer.wait_closed()
+
+
+async def stats(socket_path: str) -> dict:
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write(b'{"id": 0, "op": "stats"}\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+    return response
+
+
+async def run(socket_path: str, clients: int, games: int, seed: int, max_attempts: int) -> None:
+    targets = random.Random(seed).choices(read_words("answer-words.txt"), k=games)
+    latencies, attempts = [], []
+    st = time.perf_counter()
+    await asyncio.gather(*(play(socket_path, targets, latencies, attempts, max_attempts) for _ in range(clients)))
+    elapsed = time.perf_counter() - st
+    served = await stats(socket_path)
+
+    print(f"=== {games} games from {clients} clients against {socket_path} ===")
+    print(f"{len(latencies)} requests in {elapsed:.2f} s: {len(latencies) / elapsed:.0f} requests/s")
+    print(
+        f"latency: p50 {percentile(latencies, 50) * 1000:.2f} ms  p99 {percentile(latencies, 99) * 1000:.2f} ms"
+        f"  max {max(latencies) * 1000:.2f} ms"
+    )
+    cache = served["cache"]
+    print(f"solved {len(attempts)}/{games} within {max_attempts}, {served['coalesced']} of {served['requests']} requests coalesced")
+    print(f"cache: {cache['hits']} hits, {cache['misses']} misses, {cache['evictions']} evictions, {cache['size']} entries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plays games against a local service.py instance and reports its latency.")
+    parser.add_argument("--socket", default="/tmp/wordle-solver.sock")
+    parser.add_argument("--spawn", action="store_true", help="start a service.py instance on the socket first")
+    parser.add_argument("--strategy", default="cosine", help="of the spawned instance")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-attempts", type=int, default=6)
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = subprocess.Popen([sys.executable, "service.py", "--socket", args.socket, "--strategy", args.strategy])
+        deadline = time.monotonic() + 120
+        while not os.path.exists(args.socket):
+            assert server.poll() is None and time.monotonic() < deadline, "the service didn't start"
+            time.sleep(0.05)
+    try:
+        asyncio.run(run(args.socket, args.clients, args.games, args.seed, args.max_attempts))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
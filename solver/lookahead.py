@@ -0,0 +1,241 @@
+import math
+import time
+from hashlib import blake2b
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from feedbackmatrix import SOLVED
+from guessscorer import NUM_PATTERNS, EntropyScorer
+
+CRITERIA = ("expected", "worst")
+# candidate sets up to this size are partitioned by pairwise comparison
+PAIRWISE_LIMIT = 16
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class LookaheadSearch:
+
+    def __init__(
+        self,
+        scorer: EntropyScorer,
+        depth: int = 3,
+        width: int = 8,
+        criterion: str = "expected",
+        move_budget: float = 1.0,
+        max_entries: int = 1 << 18,
+    ) -> None:
+        """
+        Depth-limited search over guess -> pattern -> guess, minimizing either the expected or the worst-case
+        number of guesses left to solve the game.
+
+        A node is a set of candidate answers. Its value is 1 (the guess) plus the values of the buckets the
+        guess leaves, averaged by bucket size or maxed. At the last ply buckets are valued by a size-based
+        estimate instead of being searched. To keep the tree small:
+            - only the width guesses with the highest entropy are searched, after dropping every guess
+              that splits the candidates exactly like a better one (dominated);
+            - buckets are searched largest first, and a guess is abandoned as soon as its value so far
+              plus lower bounds for the remaining buckets can't beat the best sibling (alpha-beta style);
+            - values of searched nodes are cached by a fingerprint of the candidate set and the depth,
+              and reused by later moves and games.
+        Every allowed guess is considered for the shortlist at every node. Ranking the shortlist by entropy rather
+        than by estimated value keeps shallow searches from chasing guesses whose buckets the estimate gets wrong.
+
+        Moves are searched by iterative deepening with a wall-clock budget per move: when it runs out,
+        the best guess of the deepest completed iteration is returned.
+        """
+        assert criterion in CRITERIA, f"unknown criterion '{criterion}'"
+        self.scorer = scorer
+        self.feedback_matrix = scorer.feedback_matrix
+        self.depth = depth
+        self.width = width
+        self.criterion = criterion
+        self.move_budget = move_budget
+        self.max_entries = max_entries
+        self._table: Dict[Tuple[bytes, int], Tuple[float, int]] = {}
+        self._shortlists: Dict[bytes, List[Tuple[int, float]]] = {}  # every iteration of a move revisits the same nodes
+        self._deadline = math.inf
+        self.nodes = 0  # nodes searched for the last move
+        self.completed_depth = 0  # depth of the last move's deepest completed iteration
+
+        # per bucket size n, a lower bound and an estimate of the guesses still needed:
+        # a guess among n candidates is right with probability 1 / n, otherwise at least one more guess is needed,
+        # and as every guess splits the candidates in at most 243 ways, about log_243(n / 2) more after that
+        sizes = np.arange(len(self.feedback_matrix.answers) + 1, dtype=np.float64)
+        if criterion == "expected":
+            self._lower_bounds = np.where(sizes > 0, 2.0 - 1.0 / np.maximum(sizes, 1.0), 0.0)
+        else:
+            self._lower_bounds = np.minimum(sizes, 2.0)
+        self._estimates = self._lower_bounds + np.log(np.maximum(sizes / 2.0, 1.0)) / math.log(NUM_PATTERNS)
+        self._c_log_c = sizes * np.log2(np.maximum(sizes, 1.0))
+        self._c_estimates = sizes * self._estimates
+
+    def _one_ply(self, candidate_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The value of every guess with its buckets valued by estimate, and its entropy.
+        A bucket of c candidates contributes c * estimate(c), i.e., estimate(c) per candidate in it,
+        and the bucket of solved games costs nothing more.
+        """
+        n = len(candidate_ids)
+        if n <= PAIRWISE_LIMIT:
+            # for a few candidates, comparing them pairwise is cheaper than the (guesses x 243) partition counts,
+            # sizes[i, g] is the size of the bucket candidate i lands in for guess g
+            codes = self.scorer.candidate_codes(candidate_ids)
+            sizes = (codes[:, None, :] == codes[None, :, :]).sum(axis=1)
+            estimates = np.where(codes == SOLVED, 0.0, self._estimates[sizes])
+            entropies = np.log2(n) - np.log2(sizes).sum(axis=0) / n
+            if self.criterion == "expected":
+                return 1.0 + estimates.sum(axis=0) / n, entropies
+            return 1.0 + estimates.max(axis=0), entropies
+
+        # a guess that could be the answer leaves a bucket of 1 solved game, which is taken out of the sums again
+        result = self.scorer.bucket_sums(candidate_ids, [self._c_log_c, self._c_estimates], self._deadline)
+        if result is None:
+            raise _OutOfTime()
+        (c_log_c, c_estimates), largest = result
+        entropies = np.log2(n) - c_log_c / n
+        solved = np.zeros(len(entropies))
+        candidate_guess_ids = self.scorer.guess_ids_of(candidate_ids)
+        solved[candidate_guess_ids[candidate_guess_ids >= 0]] = 1.0
+        if self.criterion == "expected":
+            return 1.0 + (c_estimates - solved * self._c_estimates[1]) / n, entropies
+        # estimates grow with the bucket size, so the largest bucket has the largest estimate
+        return 1.0 + self._estimates[largest], entropies
+
+    def _shortlist(self, candidate_ids: np.ndarray) -> List[Tuple[int, float]]:
+        """
+        The (guess id, one-ply value) pairs of the width guesses with the highest entropy for a candidate set,
+        best first, without dominated guesses. Ties go to guesses that could be the answer.
+        """
+        values, entropies = self._one_ply(candidate_ids)
+        is_candidate = np.zeros(len(values), dtype=bool)
+        candidate_guess_ids = self.scorer.guess_ids_of(candidate_ids)
+        is_candidate[candidate_guess_ids[candidate_guess_ids >= 0]] = True
+        order = np.lexsort((~is_candidate, -np.round(entropies, 9)))
+
+        shortlist, partitions = [], set()
+        for guess_id in order[:4 * self.width]:
+            # a guess that splits the candidates exactly like a better one is dominated by it
+            partition = np.asarray(self.feedback_matrix.codes[guess_id])[candidate_ids].tobytes()
+            if partition in partitions:
+                continue
+            partitions.add(partition)
+            shortlist.append((int(guess_id), float(values[guess_id])))
+            if len(shortlist) == self.width:
+                break
+        return shortlist
+
+    def _buckets(self, candidate_ids: np.ndarray, guess_id: int) -> List[np.ndarray]:
+        # the candidates split by the pattern they give for the guess, without the solved bucket, largest first
+        codes = np.asarray(self.feedback_matrix.codes[guess_id])[candidate_ids]
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        buckets = [
+            candidate_ids[order[start:stop]]
+            for start, stop in zip(starts, np.r_[starts[1:], len(codes)])
+            if codes[start] != SOLVED
+        ]
+        buckets.sort(key=len, reverse=True)
+        return buckets
+
+    def _search(self, candidate_ids: np.ndarray, depth: int, bound: float) -> Tuple[float, Optional[int]]:
+        """
+        Returns the value of the candidate set and the guess that achieves it,
+        or (bound, None) if no guess is better than bound.
+        """
+        n = len(candidate_ids)
+        guess_ids = self.scorer.guess_ids_of(candidate_ids[:1])
+        if n <= 2 and guess_ids[0] >= 0:
+            # guessing one of the candidates is optimal
+            value = float(self._lower_bounds[n])
+            return (value, int(guess_ids[0])) if value < bound else (bound, None)
+
+        fingerprint = blake2b(candidate_ids.tobytes(), digest_size=16).digest()
+        key = (fingerprint, depth)
+        if key in self._table:
+            value, guess_id = self._table[key]
+            return (value, guess_id) if value < bound else (bound, None)
+        if time.perf_counter() > self._deadline:
+            raise _OutOfTime()
+        self.nodes += 1
+
+        shortlist = self._shortlists.get(fingerprint)
+        if shortlist is None:
+            shortlist = self._shortlists[fingerprint] = self._shortlist(candidate_ids)
+        if depth <= 1:
+            best_guess, best = shortlist[0]
+        else:
+            best, best_guess = math.inf, None
+            for guess_id, _ in shortlist:
+                value = self._guess_value(candidate_ids, guess_id, depth, min(best, bound))
+                if value < best:
+                    best, best_guess = value, guess_id
+
+        if best_guess is not None:
+            if len(self._table) >= self.max_entries:
+                self._table.clear()
+                self._shortlists.clear()
+            self._table[key] = (best, best_guess)
+        return (best, best_guess) if best < bound else (bound, None)
+
+    def _guess_value(self, candidate_ids: np.ndarray, guess_id: int, depth: int, bound: float) -> float:
+        # the value of a guess, or math.inf as soon as it is clear that it can't beat bound
+        n = len(candidate_ids)
+        buckets = self._buckets(candidate_ids, guess_id)
+        lower_bounds = self._lower_bounds[[len(bucket) for bucket in buckets]]
+        if self.criterion == "expected":
+            total = 1.0 + sum(len(bucket) * lb for bucket, lb in zip(buckets, lower_bounds)) / n
+            for bucket, lb in zip(buckets, lower_bounds):
+                if total >= bound:
+                    return math.inf
+                weight = len(bucket) / n
+                value, guess = self._search(bucket, depth - 1, lb + (bound - total) / weight)
+                if guess is None:
+                    return math.inf
+                total += weight * (value - lb)
+            return total
+
+        total = 1.0 + max(lower_bounds, default=0.0)
+        for bucket in buckets:
+            if total >= bound:
+                return math.inf
+            value, guess = self._search(bucket, depth - 1, bound - 1.0)
+            if guess is None:
+                return math.inf
+            total = max(total, 1.0 + value)
+        return total
+
+    def best_guess(self, candidate_ids: np.ndarray, budget: Optional[float] = None) -> Optional[str]:
+        """
+        Searches for move_budget seconds, of which the first ply always completes.
+        With an explicit budget the first ply is cut short too, and None is returned if it doesn't fit.
+        """
+        if len(candidate_ids) == 0:
+            return None
+        if len(candidate_ids) <= 2:
+            return self.feedback_matrix.answers[candidate_ids[0]]
+
+        candidate_ids = np.sort(np.asarray(candidate_ids, dtype=np.int64))
+        deadline = time.perf_counter() + (self.move_budget if budget is None else budget)
+        self.nodes = 0
+        self.completed_depth = 0
+        self._deadline = math.inf if budget is None else deadline
+        try:
+            _, best = self._search(candidate_ids, 1, math.inf)
+        except _OutOfTime:
+            self._deadline = math.inf
+            return None
+        self.completed_depth = 1
+        self._deadline = deadline
+        for depth in range(2, self.depth + 1):
+            try:
+                _, guess_id = self._search(candidate_ids, depth, math.inf)
+            except _OutOfTime:
+                break
+            best, self.completed_depth = guess_id, depth
+        self._deadline = math.inf
+        return self.feedback_matrix.guesses[best]
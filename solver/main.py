@@ -1,7 +1,23 @@
+import argparse
+import contextlib
+import io
+import os
 import random
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
-from wordlesolver import WordleSolver
+from bitsetengine import BitsetSearchEngine
+from solverengine import SolverSearchEngine
+from stats import percentile
+from trieengine import TrieSearchEngine
+from wordlesolver import STRATEGIES, WordleSolver
+
+ENGINES = {"posting": SolverSearchEngine, "bitset": BitsetSearchEngine, "trie": TrieSearchEngine}
+
+# one solver per worker process, built once by _init_worker and reused for every game
+_solver = None
 
 
 def main():
@@ -51,7 +67,103 @@ def main():
     return results
 
 
+def _init_worker(engine: str, strategy: str, latency_budget: Optional[float] = None) -> None:
+    global _solver
+    _solver = WordleSolver(engine_class=ENGINES[engine], strategy=strategy, latency_budget=latency_budget)
+
+
+def _solve_one(word: str, max_attempts: int):
+    st = time.perf_counter()
+    _solver.reset(word)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = _solver.solve(max_attempts=max_attempts)
+    return result, time.perf_counter() - st
+
+
+def benchmark(
+    sample: int = 0,
+    seed: int = 0,
+    workers: int = 0,
+    engine: str = "bitset",
+    strategy: str = "cosine",
+    max_attempts: int = 6,
+    latency_budget: Optional[float] = None,
+):
+    """
+    Deterministic benchmark: solves every answer word, or a seeded sample of them, spread over a process pool.
+    """
+    with open("answer-words.txt", "r") as f:
+        words = [line.strip() for line in f if line.strip()]
+    if sample:
+        words = sorted(random.Random(seed).sample(words, sample))
+    workers = workers or os.cpu_count() or 1
+
+    st = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(engine, strategy, latency_budget)) as pool:
+        # building the solver is paid once per worker process, not per game
+        outcomes = list(
+            pool.map(
+                _solve_one,
+                words,
+                [max_attempts] * len(words),
+                chunksize=max(1, len(words) // (workers * 8)),
+            )
+        )
+    end = time.perf_counter()
+
+    results = [result for result, _ in outcomes]
+    latencies = [latency for _, latency in outcomes]
+    solved = [r for r in results if r["success"]]
+    distribution = Counter(r["attempts"] if r["success"] else "X" for r in results)
+    worst = max((r["attempts"] for r in solved), default=0)
+
+    print(f"=== Benchmark: {len(words)} words, {workers} workers, engine={engine}, strategy={strategy} ===")
+    print(f"Solved: {len(solved)}/{len(words)}")
+    if solved:
+        print(f"Mean attempts (solved): {sum(r['attempts'] for r in solved) / len(solved):.4f}")
+    for attempts in sorted(distribution, key=str):
+        print(f"  {attempts}: {distribution[attempts]}")
+    print(f"Worst case: {worst} attempts: {', '.join(r['target_word'] for r in solved if r['attempts'] == worst)}")
+    failed = [r["target_word"] for r in results if not r["success"]]
+    if failed:
+        print(f"Not solved within {max_attempts} attempts: {', '.join(failed)}")
+    print(f"Wall clock: {end - st:.2f} s, including worker start-up")
+    print(
+        "Per game: "
+        + "  ".join(f"p{q} {percentile(latencies, q) * 1000:.2f} ms" for q in (50, 90, 99))
+        + f"  max {max(latencies) * 1000:.2f} ms"
+    )
+    return results
+
+
+def absurdle(engine: str = "bitset", strategy: str = "cosine", max_attempts: int = 6):
+    """
+    Plays one adversarial game, i.e., the worst case of the solver over all answer words at once.
+    """
+    solver = WordleSolver(engine_class=ENGINES[engine], strategy=strategy)
+    st = time.perf_counter()
+    solver.reset_adversarial()
+    result = solver.solve(max_attempts=max_attempts)
+    print(f"=== Absurdle: engine={engine}, strategy={strategy}, {time.perf_counter() - st:.3f} s ===")
+    return result
+
+
 if __name__ == "__main__":
-    # WordleSolver().solve()
-    main()
-    # WordleSolver()
+    parser = argparse.ArgumentParser(description="Wordle solver. Without --benchmark, plays 100 random games verbosely.")
+    parser.add_argument("--benchmark", action="store_true", help="solve every answer word in a process pool")
+    parser.add_argument("--absurdle", action="store_true", help="play one game against an adversarial host")
+    parser.add_argument("--sample", type=int, default=0, help="only solve a seeded sample of this many words")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=0, help="default: one per core")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="bitset")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="cosine")
+    parser.add_argument("--max-attempts", type=int, default=6)
+    parser.add_argument("--latency-budget", type=float, default=None, help="seconds per guess, see AnytimeSelector")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.sample, args.seed, args.workers, args.engine, args.strategy, args.max_attempts, args.latency_budget)
+    elif args.absurdle:
+        absurdle(args.engine, args.strategy, args.max_attempts)
+    else:
+        main()
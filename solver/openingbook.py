@@ -0,0 +1,132 @@
+import argparse
+import os
+import struct
+from typing import Dict, List, Optional, Sequence
+
+from feedbackmatrix import SOLVED, wordlist_hash
+
+"""
+On-disk format, all integers little-endian:
+    header:  magic b"WOB1" | key (16 ascii bytes) | word length (uint8) | number of entries (uint32)
+    entry:   history length n (uint8) | n feedback codes (uint8 each) | next guess (word length ascii bytes)
+The history is the feedback codes seen so far, the guesses themselves are implied by the book.
+"""
+
+MAGIC = b"WOB1"
+HEADER = struct.Struct("<4s16sBI")
+# part of every book key, bump it when a change to the solver changes its moves, so that older books stop loading
+BOOK_VERSION = 2
+
+
+def book_key(guesses: List[str], answers: List[str], strategy: str, opener: str, settings: Sequence[str] = ()) -> str:
+    """
+    A book only answers for the word lists, strategy and opening guess it was built with, and for the other
+    settings that change the solver's moves, as "name=value" strings.
+    """
+    return wordlist_hash(guesses, answers, [f"version={BOOK_VERSION}", strategy, opener, *settings])
+
+
+def book_path(strategy: str, directory: str = ".") -> str:
+    return os.path.join(directory, f"opening-book-{strategy}.bin")
+
+
+class OpeningBook:
+    """
+    The solver's whole decision tree, precomputed: maps the feedback history of a game to the next guess.
+
+    Built offline by playing the solver against every answer word, so that solving an answer word
+    is just one dictionary lookup per turn. Histories outside the tree get None, and the solver
+    falls back to computing the guess live.
+    """
+
+    def __init__(self, key: str, moves: Optional[Dict[bytes, str]] = None) -> None:
+        self.key = key
+        self.moves = moves if moves is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def get(self, history: bytes) -> Optional[str]:
+        return self.moves.get(bytes(history))
+
+    @staticmethod
+    def build(solver, answers: List[str], key: str, max_attempts: int = 6) -> "OpeningBook":
+        """
+        Plays every answer with a solver that has no opening book, and records the guess made after every history.
+        Games share prefixes, so a history that is already in the book is replayed instead of recomputed.
+        """
+        book = OpeningBook(key)
+        for answer in answers:
+            solver.reset(answer)
+            history = b""
+            guess = solver.guess
+            book.moves[history] = guess
+            for _ in range(max_attempts - 1):
+                code = solver.get_feedback_code(guess)
+                if code == SOLVED:
+                    break
+                solver.filter_candidates(code, guess)
+                solver.guess = guess
+                history += bytes([code])
+                guess = book.moves.get(history) or solver.guess_word()
+                if guess is None:
+                    break
+                book.moves[history] = guess
+        return book
+
+    def save(self, path: str) -> None:
+        word_length = len(next(iter(self.moves.values())))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.key.encode("ascii"), word_length, len(self.moves)))
+            for history, guess in sorted(self.moves.items()):
+                f.write(bytes([len(history)]) + history + guess.encode("ascii"))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str, key: str) -> Optional["OpeningBook"]:
+        """
+        Returns None if there is no book at path, or if it was built for other word lists or settings.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, stored_key, word_length, count = HEADER.unpack_from(data)
+        if magic != MAGIC or stored_key.decode("ascii") != key:
+            return None
+
+        moves = {}
+        offset = HEADER.size
+        for _ in range(count):
+            n = data[offset]
+            history = data[offset + 1:offset + 1 + n]
+            offset += 1 + n
+            moves[history] = data[offset:offset + word_length].decode("ascii")
+            offset += word_length
+        return OpeningBook(key, moves)
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+
+    from bitsetengine import BitsetSearchEngine
+    from wordlesolver import STRATEGIES, WordleSolver
+
+    parser = argparse.ArgumentParser(description="Builds the opening book for a solver strategy, run from the solver directory.")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="cosine")
+    parser.add_argument("--lookahead-depth", type=int, default=3)
+    parser.add_argument("--move-budget", type=float, default=1.0)
+    parser.add_argument("--approximate", action="store_true")
+    args = parser.parse_args()
+
+    solver = WordleSolver(
+        engine_class=BitsetSearchEngine, strategy=args.strategy, use_opening_book=False,
+        lookahead_depth=args.lookahead_depth, move_budget=args.move_budget, approximate=args.approximate,
+    )
+    answers = [document.get_field("body", "") for document in solver.corpus]
+    with contextlib.redirect_stdout(io.StringIO()):
+        book = OpeningBook.build(solver, answers, solver.opening_book_key())
+    book.save(book_path(args.strategy))
+    print(f"Wrote {len(book)} positions to {book_path(args.strategy)}")
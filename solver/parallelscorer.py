@@ -0,0 +1,141 @@
+import math
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from feedbackmatrix import FeedbackMatrix
+from guessscorer import NUM_PATTERNS
+
+# per worker process: views into the memory-mapped codes and the shared memory set up by _init_worker
+_shared = {}
+
+
+def _init_worker(
+    codes_path: Optional[str], codes_name: Optional[str], ids_name: str, shape: Tuple[int, int], chunk_size: int
+) -> None:
+    # the workers share the parent's resource tracker, so attaching doesn't make them unlink the blocks on exit
+    blocks = [shared_memory.SharedMemory(name=ids_name)]
+    if codes_path is not None:
+        codes = np.load(codes_path, mmap_mode="r")
+    else:
+        blocks.append(shared_memory.SharedMemory(name=codes_name))
+        codes = np.ndarray(shape, dtype=np.uint8, buffer=blocks[-1].buf)
+    num_answers, num_guesses = shape
+    sizes = np.arange(num_answers + 1, dtype=np.float64)
+    _shared.update(
+        blocks=blocks,
+        codes=codes,
+        ids=np.ndarray(num_answers, dtype=np.int64, buffer=blocks[0].buf),
+        chunk_size=chunk_size,
+        offsets=np.arange(chunk_size, dtype=np.int32) * NUM_PATTERNS,
+        tables={"entropy": sizes * np.log2(np.maximum(sizes, 1.0)), "expected_size": sizes * sizes},
+    )
+
+
+def _score_shard(n: int, start: int, stop: int, criterion: str) -> Tuple[float, np.ndarray]:
+    """
+    Scores the guesses start..stop against the first n candidate ids in shared memory, the same way as
+    EntropyScorer.scores(), and returns the best score of the shard and the guess ids within 1e-9 of it.
+    """
+    codes = _shared["codes"][_shared["ids"][:n], start:stop]
+    table = _shared["tables"][criterion]
+    chunk_size = _shared["chunk_size"]
+    sums = np.empty(stop - start, dtype=np.float64)
+    for i in range(0, stop - start, chunk_size):
+        chunk = codes[:, i:i + chunk_size]
+        flat = chunk + _shared["offsets"][:chunk.shape[1]]
+        counts = np.bincount(flat.ravel(), minlength=chunk.shape[1] * NUM_PATTERNS)
+        sums[i:i + chunk.shape[1]] = table[counts.reshape(chunk.shape[1], NUM_PATTERNS)].sum(axis=1)
+    scores = np.log2(n) - sums / n if criterion == "entropy" else -sums / n
+    best = scores.max()
+    return best, start + np.flatnonzero(scores >= best - 1e-9)
+
+
+def _release(pool: ProcessPoolExecutor, blocks: Tuple[shared_memory.SharedMemory, ...]) -> None:
+    pool.shutdown()
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+class ParallelScorer:
+
+    def __init__(self, feedback_matrix: FeedbackMatrix, workers: Optional[int] = None, chunk_size: int = 256) -> None:
+        """
+        EntropyScorer.best_guess() spread over a pool of worker processes, one shard of the guess pool each.
+
+        Every worker memory-maps the answer-major feedback codes from their .npy file, see
+        FeedbackMatrix.codes_by_answer, or for a matrix without files, from a copy in a multiprocessing.shared_memory
+        block. The candidate ids of a call are written to another shared block, so a task is just a few integers
+        and the large arrays are never pickled. Each worker returns the best guesses of its shard,
+        which are merged with the same tie-breaking as EntropyScorer.
+        Call close() (or use it as a context manager) to stop the workers and free the shared memory.
+        """
+        self.feedback_matrix = feedback_matrix
+        self.workers = workers or os.cpu_count() or 1
+        codes = feedback_matrix.codes_by_answer
+        num_answers = len(feedback_matrix.answers)
+        self._ids_block = shared_memory.SharedMemory(create=True, size=num_answers * 8)
+        blocks = [self._ids_block]
+        codes_name = None
+        if feedback_matrix.by_answer_path is None:
+            codes_block = shared_memory.SharedMemory(create=True, size=codes.nbytes)
+            np.ndarray(codes.shape, dtype=np.uint8, buffer=codes_block.buf)[...] = codes
+            blocks.append(codes_block)
+            codes_name = codes_block.name
+        self._ids = np.ndarray(num_answers, dtype=np.int64, buffer=self._ids_block.buf)
+        self._answer_guess_ids = np.array(
+            [feedback_matrix.guess_ids.get(w, -1) for w in feedback_matrix.answers], dtype=np.int64
+        )
+        # the candidate ids block is rewritten by every call
+        self._lock = threading.Lock()
+
+        bounds = np.linspace(0, len(feedback_matrix.guesses), self.workers + 1).astype(int)
+        self.shards: List[Tuple[int, int]] = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        self.pool = ProcessPoolExecutor(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(feedback_matrix.by_answer_path, codes_name, self._ids_block.name, codes.shape, chunk_size),
+        )
+        # also on garbage collection or at exit, so the shared memory is never left behind
+        self._finalizer = weakref.finalize(self, _release, self.pool, tuple(blocks))
+
+    def best_guess(self, candidate_ids: np.ndarray, criterion: str = "entropy", deadline: float = math.inf) -> Optional[str]:
+        """
+        The same contract as EntropyScorer.best_guess(). The deadline is only checked once the shards are back.
+        """
+        if criterion not in ("entropy", "expected_size"):
+            raise ValueError(f"unknown criterion '{criterion}'")
+        if len(candidate_ids) == 0:
+            return None
+        if len(candidate_ids) <= 2:
+            return self.feedback_matrix.answers[candidate_ids[0]]
+
+        n = len(candidate_ids)
+        with self._lock:
+            self._ids[:n] = candidate_ids
+            results = list(self.pool.map(_score_shard, *zip(*((n, start, stop, criterion) for start, stop in self.shards))))
+        if time.perf_counter() > deadline:
+            return None
+
+        best_score = max(best for best, _ in results)
+        best = np.concatenate([ids for shard_best, ids in results if shard_best >= best_score - 1e-9])
+        candidate_guess_ids = self._answer_guess_ids[candidate_ids]
+        best_candidates = np.intersect1d(best, candidate_guess_ids[candidate_guess_ids >= 0])
+        guess_id = best_candidates[0] if len(best_candidates) else best.min()
+        return self.feedback_matrix.guesses[guess_id]
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def __enter__(self) -> "ParallelScorer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,195 @@
+import math
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from feedbackmatrix import compute_codes, word_letters
+from guessscorer import EntropyScorer
+
+
+class SampledEntropyScorer:
+
+    def __init__(
+        self,
+        guesses: List[str],
+        answers: List[str],
+        scorer: Optional[EntropyScorer] = None,
+        target_error: float = 0.15,
+        min_sample: int = 64,
+        max_sample: int = 512,
+        top_k: int = 16,
+        exact_below: int = 512,
+        z: float = 1.96,
+        seed: int = 0,
+        chunk_size: int = 1024,
+    ) -> None:
+        """
+        Approximate EntropyScorer.best_guess() for candidate sets too large to score every guess against exactly,
+        for word lists too large, or words too long, for a FeedbackMatrix.
+
+        Every guess is scored on a stratified sample of the candidates: the candidate ids are sorted, and so
+        alphabetical, so a systematic sample (every k-th id from a random start) takes each stretch of the
+        alphabet in proportion to its size. Each score comes with its standard error, from which we get a
+        confidence interval of z standard errors. If the top scores of a pilot sample of min_sample candidates are
+        less precise than target_error (in bits for entropy, in candidates for expected size), they are scored once
+        more on a sample of the size that should reach it, up to max_sample. Only the guesses whose interval overlaps
+        the best lower bound, at most top_k of them, are then scored exactly on all the candidates, and the best of
+        those is returned.
+
+        The feedback codes are computed on the fly from the letters of the words, with compute_codes(), for chunk_size
+        guesses at a time, so only the sample's codes ever exist. Given the EntropyScorer of a FeedbackMatrix of the
+        same word lists, its precomputed codes are read instead, and sets of fewer than exact_below candidates are
+        scored exactly right away, as that is then about as fast.
+        """
+        self.guesses = guesses
+        self.answers = answers
+        self.scorer = scorer
+        self.num_patterns = 3 ** len(answers[0])
+        self.chunk_size = chunk_size
+        if scorer is None:
+            self._guess_letters = word_letters(guesses)
+            self._answer_letters = word_letters(answers)
+            guess_ids = {w: i for i, w in enumerate(guesses)}
+            self._answer_guess_ids = np.array([guess_ids.get(w, -1) for w in answers], dtype=np.int64)
+        self.target_error = target_error
+        self.min_sample = min_sample
+        self.max_sample = max_sample
+        self.top_k = top_k
+        self.exact_below = exact_below
+        self.z = z
+        self.rng = np.random.default_rng(seed)
+        self.last_sample_size = 0
+        self.last_rescored = 0
+
+    def _sample(self, candidate_ids: np.ndarray, size: int) -> np.ndarray:
+        step = len(candidate_ids) / size
+        positions = (self.rng.random() * step + step * np.arange(size)).astype(np.int64)
+        return candidate_ids[np.minimum(positions, len(candidate_ids) - 1)]
+
+    def _guess_ids_of(self, candidate_ids: np.ndarray) -> np.ndarray:
+        if self.scorer is not None:
+            return self.scorer.guess_ids_of(candidate_ids)
+        return self._answer_guess_ids[candidate_ids]
+
+    def _codes(self, guess_ids: np.ndarray, candidate_ids: np.ndarray) -> np.ndarray:
+        # (guesses x candidates) feedback codes
+        if self.scorer is not None:
+            return np.asarray(self.scorer.feedback_matrix.codes[guess_ids])[:, candidate_ids]
+        return compute_codes(self._guess_letters[guess_ids], self._answer_letters[candidate_ids])
+
+    def _partition_chunks(self, candidate_ids: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        # like EntropyScorer._partition_chunks(), with the codes of every chunk of guesses computed on the fly
+        offsets = np.arange(self.chunk_size, dtype=np.int64)[:, None] * self.num_patterns
+        for start in range(0, len(self.guesses), self.chunk_size):
+            codes = self._codes(np.arange(start, min(start + self.chunk_size, len(self.guesses))), candidate_ids)
+            counts = np.bincount((codes + offsets[:len(codes)]).ravel(), minlength=len(codes) * self.num_patterns)
+            yield start, counts.reshape(len(codes), self.num_patterns)
+
+    def _bucket_sums(self, sample: np.ndarray, tables: List[np.ndarray], deadline: float) -> Optional[np.ndarray]:
+        # the same as EntropyScorer.bucket_sums(), without the largest buckets
+        if self.scorer is not None:
+            result = self.scorer.bucket_sums(sample, tables, deadline)
+            return None if result is None else result[0]
+        sums = np.empty((len(tables), len(self.guesses)), dtype=np.float64)
+        for start, counts in self._partition_chunks(sample):
+            for i, table in enumerate(tables):
+                sums[i, start:start + len(counts)] = table[counts].sum(axis=1)
+            if time.perf_counter() > deadline:
+                return None
+        return sums
+
+    def estimates(self, candidate_ids: np.ndarray, criterion: str = "entropy", deadline: float = math.inf):
+        """
+        Returns (scores, standard errors, sample size) for every guess, higher scores are better as in EntropyScorer.scores(),
+        or None if the deadline passes first.
+        """
+        n = len(candidate_ids)
+        # two stages: a pilot sample of min_sample candidates, and if its top scores aren't precise enough,
+        # one more sample of the size that should make them so
+        size = min(n, self.min_sample)
+        for stage in range(2):
+            sample = candidate_ids if size >= n else self._sample(candidate_ids, size)
+            result = self._estimate(sample, n, criterion, deadline)
+            if result is None:
+                return None
+            scores, errors = result
+            top = np.argpartition(-scores, min(self.top_k, len(scores) - 1))[:self.top_k]
+            error = errors[top].max()
+            if stage == 1 or size >= n or error <= self.target_error:
+                break
+            # the standard error shrinks with the square root of the sample size
+            size = min(n, self.max_sample, int(math.ceil(size * (error / self.target_error) ** 2)))
+        return scores, errors, size
+
+    def _estimate(
+        self, sample: np.ndarray, n: int, criterion: str, deadline: float
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        m = len(sample)
+        # per bucket size c in the sample, functions of its share p = c / m, summed over the buckets of every guess
+        p = np.arange(len(self.answers) + 1, dtype=np.float64) / m
+        log_p = np.log2(np.maximum(p, 1e-300))
+        if criterion == "entropy":
+            tables = [-p * log_p, p * log_p * log_p, (p > 0).astype(np.float64)]
+        elif criterion == "expected_size":
+            tables = [p * p, p * p * p]
+        else:
+            raise ValueError(f"unknown criterion '{criterion}'")
+        sums = self._bucket_sums(sample, tables, deadline)
+        if sums is None:
+            return None
+        exact = m >= n
+
+        if criterion == "entropy":
+            # plug-in entropy of the sampled bucket shares, with the Miller-Madow correction for its downward bias,
+            # and the delta-method variance of -log2(p) over the candidates
+            entropy = sums[0] + (0.0 if exact else (sums[2] - 1) / (2 * m * math.log(2)))
+            variance = sums[1] - sums[0] ** 2
+            return entropy, np.zeros(len(entropy)) if exact else np.sqrt(np.maximum(variance, 0.0) / m)
+
+        # a candidate lands in a bucket with a share p of the candidates, i.e., of n * p candidates
+        variance = sums[1] - sums[0] ** 2
+        return -n * sums[0], np.zeros(len(sums[0])) if exact else n * np.sqrt(np.maximum(variance, 0.0) / m)
+
+    def _exact_scores(self, candidate_ids: np.ndarray, guess_ids: np.ndarray, criterion: str) -> np.ndarray:
+        # exact scores for a few guesses against all the candidates
+        n = len(candidate_ids)
+        codes = self._codes(guess_ids, candidate_ids)
+        offsets = np.arange(len(guess_ids), dtype=np.int64)[:, None] * self.num_patterns
+        counts = np.bincount((codes + offsets).ravel(), minlength=len(guess_ids) * self.num_patterns)
+        counts = counts.reshape(len(guess_ids), self.num_patterns)
+        if criterion == "entropy":
+            return np.log2(n) - (counts * np.log2(np.maximum(counts, 1))).sum(axis=1) / n
+        return -(counts * counts).sum(axis=1) / n
+
+    def best_guess(self, candidate_ids: np.ndarray, criterion: str = "entropy", deadline: float = math.inf) -> Optional[str]:
+        """
+        The same contract as EntropyScorer.best_guess().
+        """
+        if len(candidate_ids) == 0:
+            return None
+        if len(candidate_ids) <= 2:
+            return self.answers[candidate_ids[0]]
+
+        candidate_ids = np.sort(np.asarray(candidate_ids, dtype=np.int64))
+        if len(candidate_ids) < self.exact_below and self.scorer is not None:
+            self.last_sample_size, self.last_rescored = len(candidate_ids), 0
+            return self.scorer.best_guess(candidate_ids, criterion, deadline)
+        # without the matrix every code is computed, and small sets are sampled like large ones
+        result = self.estimates(candidate_ids, criterion, deadline)
+        if result is None:
+            return None
+        scores, errors, self.last_sample_size = result
+
+        # the guesses that could still be the best one, best estimate first
+        lower_bound = (scores - self.z * errors).max()
+        contenders = np.flatnonzero(scores + self.z * errors >= lower_bound)
+        contenders = contenders[np.argsort(-scores[contenders], kind="stable")[:self.top_k]]
+        self.last_rescored = len(contenders)
+
+        exact = self._exact_scores(candidate_ids, contenders, criterion)
+        best = contenders[exact >= exact.max() - 1e-9]
+        candidate_guess_ids = self._guess_ids_of(candidate_ids)
+        best_candidates = np.intersect1d(best, candidate_guess_ids[candidate_guess_ids >= 0])
+        guess_id = best_candidates[0] if len(best_candidates) else np.sort(best)[0]
+        return self.guesses[guess_id]
@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import stat
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from constraints import constraint_signature
+from feedbackmatrix import SOLVED, WORD_LENGTH
+from main import ENGINES
+from wordlesolver import STRATEGIES, WordleModel
+
+"""
+Line-delimited JSON protocol, one object per line each way:
+    request:   {"id": any, "history": [[guess, feedback], ...]}
+               feedback is a feedback code (0..242, see feedbackmatrix) or a string of statuses such as "20100"
+    response:  {"id": same, "guess": next guess or null, "candidates": candidates left}
+               or {"id": same, "error": message}
+    request:   {"id": any, "op": "stats"}
+    response:  {"id": same, "requests": n, "coalesced": n, "in_flight": n, "cache": {"size", "hits", "misses", "evictions"}}
+Responses on a connection come back as they are ready, not necessarily in request order.
+"""
+
+History = Tuple[Tuple[str, int], ...]
+
+
+def parse_history(history) -> History:
+    if not isinstance(history, list):
+        raise ValueError("history must be a list of [guess, feedback] pairs")
+    parsed = []
+    for entry in history:
+        if not isinstance(entry, list) or len(entry) != 2:
+            raise ValueError("history must be a list of [guess, feedback] pairs")
+        guess, feedback = entry
+        if not isinstance(guess, str) or len(guess) != WORD_LENGTH or not (guess.isascii() and guess.isalpha()):
+            raise ValueError(f"not a {WORD_LENGTH}-letter guess: {guess!r}")
+        if isinstance(feedback, str):
+            if len(feedback) != WORD_LENGTH or any(c not in "012" for c in feedback):
+                raise ValueError(f"not a feedback: {feedback!r}")
+            feedback = sum(int(c) * 3**i for i, c in enumerate(feedback))
+        # bool is an int too, but JSON true / false is not a feedback code
+        if not isinstance(feedback, int) or isinstance(feedback, bool) or not 0 <= feedback <= SOLVED:
+            raise ValueError(f"not a feedback: {feedback!r}")
+        parsed.append((guess.lower(), feedback))
+    return tuple(parsed)
+
+
+class LRUCache:
+
+    def __init__(self, max_entries: int) -> None:
+        """
+        A dict that keeps at most max_entries, dropping the least recently used one, and counts its hits,
+        misses and evictions.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class ThreadedLineReader:
+
+    def __init__(self, file) -> None:
+        """
+        The readline() of an asyncio.StreamReader for a blocking binary file, reading in the default executor.
+        For stdin redirected from a regular file, which a pipe transport can't read.
+        """
+        self.file = file
+
+    async def readline(self) -> bytes:
+        return await asyncio.get_running_loop().run_in_executor(None, self.file.readline)
+
+
+class SolverService:
+
+    def __init__(self, model: WordleModel, threads: int = 4, cache_entries: int = 1 << 16) -> None:
+        """
+        Answers guess suggestions for many clients at once on top of a shared WordleModel.
+
+        Every request is replayed on a fresh GameSession in a thread pool, so the event loop only parses and routes.
+        Histories are reduced to their constraint signature, see constraint_signature(): histories with the same one
+        have the same candidates, so their suggestions are memoized by it in an LRU of cache_entries, and requests
+        for one that is being computed are coalesced: they all wait for the same result.
+        """
+        self.model = model
+        self.executor = ThreadPoolExecutor(threads)
+        self.cache = LRUCache(cache_entries)
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    def book_move(self, history: History) -> Optional[str]:
+        """
+        The opening book's move after the history, or None if the history left the book. The book is keyed by the
+        feedback codes alone, as its guesses are implied, so the history must also have played the book's guesses.
+        """
+        book = self.model.opening_book
+        if book is None or not history or history[0][0] != self.model.opener:
+            return None
+        codes = bytes(code for _, code in history)
+        if any(guess != book.get(codes[:i]) for i, (guess, _) in enumerate(history) if i > 0):
+            return None
+        return book.get(codes)
+
+    def cache_key(self, history: History) -> Hashable:
+        """
+        Besides the candidates, a suggestion depends on whether the opening book has the history, and with the cosine
+        strategy on the previous guess too.
+        """
+        codes = bytes(code for _, code in history)
+        in_book = not history or self.book_move(history) is not None
+        previous = history[-1][0] if history and not in_book and self.model.strategy == "cosine" else None
+        return constraint_signature(history), codes if in_book else None, previous
+
+    def suggest(self, history: History) -> dict:
+        """
+        The next guess after the history, the same one solve() would make, and the number of candidates left.
+        Every request gets a new session, and under a latency budget they share the model's tier costs.
+        """
+        if history and history[-1][1] == SOLVED:
+            return {"guess": None, "candidates": 1}
+        session = self.model.new_session()
+        for guess, code in history:
+            session.filter_candidates(code, guess)
+            session.guess = guess
+        guess = session.opener if not history else self.book_move(history)
+        if guess is None:
+            guess = session.guess_word()
+        return {"guess": guess, "candidates": len(session.candidates)}
+
+    async def handle(self, request: dict) -> dict:
+        if request.get("op") == "stats":
+            return {
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+                "cache": self.cache.stats(),
+            }
+        history = parse_history(request.get("history", []))
+        self.requests += 1
+        key = self.cache_key(history)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, self.suggest, history)
+            self._in_flight[key] = future
+
+            def done(_):
+                try:
+                    if not future.cancelled() and future.exception() is None:
+                        self.cache.put(key, future.result())
+                finally:
+                    self._in_flight.pop(key, None)
+
+            future.add_done_callback(done)
+        # shielded, so a client that goes away doesn't cancel the result for the others
+        return await asyncio.shield(future)
+
+    async def respond(self, line: str) -> str:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+            request_id = request.get("id")
+            response = await self.handle(request)
+        except ValueError as error:  # json.JSONDecodeError is a ValueError too
+            response = {"error": str(error)}
+        except Exception as error:
+            # every request gets a reply, also the coalesced ones waiting on a suggestion that failed
+            response = {"error": f"internal error: {type(error).__name__}: {error}"}
+        return json.dumps({"id": request_id, **response})
+
+    async def serve(self, reader: asyncio.StreamReader, write: Callable[[str], Awaitable[None]]) -> None:
+        # every line is answered in its own task, so a slow request doesn't hold up the ones behind it
+        tasks = set()
+
+        async def answer(line: str) -> None:
+            response = await self.respond(line)  # never raises, failures are replies too
+            try:
+                await write(response)
+            except ConnectionError:
+                pass  # the client went away, the other tasks find out on their own writes
+
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            task = asyncio.create_task(answer(line.decode("utf-8")))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        lock = asyncio.Lock()
+
+        async def write(response: str) -> None:
+            async with lock:
+                writer.write(response.encode("utf-8") + b"\n")
+                await writer.drain()
+
+        try:
+            await self.serve(reader, write)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_unix(self, path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)  # left behind by an instance that was killed
+        server = await asyncio.start_unix_server(self.serve_connection, path)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        print(f"Serving on {path}", file=sys.stderr)
+        async with server:
+            await stop.wait()
+        os.remove(path)
+
+    async def serve_stdio(self) -> None:
+        loop = asyncio.get_running_loop()
+        if stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):
+            reader = ThreadedLineReader(sys.stdin.buffer)
+        else:
+            reader = asyncio.StreamReader()
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        async def write(response: str) -> None:
+            sys.stdout.write(response + "\n")
+            sys.stdout.flush()
+
+        await self.serve(reader, write)
+
+
+def run(
+    socket_path: Optional[str],
+    engine: str,
+    strategy: str,
+    threads: int,
+    latency_budget: Optional[float],
+    cache_entries: int = 1 << 16,
+) -> None:
+    model = WordleModel(engine_class=ENGINES[engine], strategy=strategy, latency_budget=latency_budget)
+    service = SolverService(model, threads, cache_entries)
+    asyncio.run(service.serve_unix(socket_path) if socket_path else service.serve_stdio())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serves guess suggestions as line-delimited JSON, run from the solver directory."
+    )
+    parser.add_argument("--socket", default=None, help="Unix socket path, default: stdin/stdout")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="bitset")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="cosine")
+    parser.add_argument("--threads", type=int, default=4, help="threads for the scoring")
+    parser.add_argument("--cache-entries", type=int, default=1 << 16, help="suggestions kept in the LRU")
+    parser.add_argument("--latency-budget", type=float, default=None, help="seconds per guess, see AnytimeSelector")
+    args = parser.parse_args()
+    run(args.socket, args.engine, args.strategy, args.threads, args.latency_budget, args.cache_entries)
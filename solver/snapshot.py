@@ -0,0 +1,87 @@
+import mmap
+import os
+import struct
+from typing import Dict, Optional
+
+import numpy as np
+
+"""
+Snapshot file layout, all integers little-endian:
+    header:  magic b"WSS1" | format version (uint32) | key (16 ascii bytes) | number of sections (uint32)
+    table:   per section: name (32 bytes, NUL padded ascii) | offset (uint64) | length (uint64)
+    data:    the sections back to back, each starting at an 8-byte aligned offset so arrays can be viewed in place
+Bump VERSION whenever the sections a reader expects change.
+"""
+
+MAGIC = b"WSS1"
+VERSION = 1
+HEADER = struct.Struct("<4sI16sI")
+ENTRY = struct.Struct("<32sQQ")
+ALIGNMENT = 8
+
+
+def snapshot_path(key: str, directory: str = ".") -> str:
+    return os.path.join(directory, f"solver-snapshot-{key}.bin")
+
+
+def save_snapshot(path: str, key: str, sections: Dict[str, bytes]) -> None:
+    """
+    Writes the named sections, e.g., ndarray.tobytes() or the to_bytes() of an index, as one flat file.
+    """
+    offset = HEADER.size + ENTRY.size * len(sections)
+    table, padded = [], []
+    for name, data in sections.items():
+        offset += -offset % ALIGNMENT
+        table.append(ENTRY.pack(name.encode("ascii"), offset, len(data)))
+        padded.append(data)
+        offset += len(data)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, key.encode("ascii"), len(sections)))
+        f.write(b"".join(table))
+        for data in padded:
+            f.write(b"\0" * (-f.tell() % ALIGNMENT))
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """
+    A memory-mapped snapshot file. Sections are handed out as zero-copy views into the mapping,
+    so they stay valid for as long as the snapshot object (or an array viewing it) is alive.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.magic, self.version, key, count = HEADER.unpack_from(self._buffer)
+        self.key = key.decode("ascii", errors="replace")
+        self.sections = {}
+        for i in range(count if self.magic == MAGIC else 0):
+            name, offset, length = ENTRY.unpack_from(self._buffer, HEADER.size + i * ENTRY.size)
+            self.sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+
+    @staticmethod
+    def open(path: str, key: str) -> Optional["Snapshot"]:
+        """
+        Returns None if there is no snapshot at path, or if it has another format version or was built from other word lists.
+        """
+        if not os.path.exists(path):
+            return None
+        snapshot = Snapshot(path)
+        if snapshot.magic != MAGIC or snapshot.version != VERSION or snapshot.key != key:
+            return None
+        return snapshot
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections
+
+    def get_bytes(self, name: str) -> memoryview:
+        offset, length = self.sections[name]
+        return memoryview(self._buffer)[offset:offset + length]
+
+    def get_array(self, name: str, dtype, shape=None) -> np.ndarray:
+        array = np.frombuffer(self.get_bytes(name), dtype=dtype)
+        return array if shape is None else array.reshape(shape)
@@ -1,26 +1,46 @@
+from array import array
 from collections import Counter
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from context import in3120
+from feedbackmatrix import GRAY, GREEN, STATUSES, YELLOW, encode_feedback
 from wordleinvertedindex import WordleInvertedIndex
 
 
 class SolverSearchEngine:
 
-    def __init__(self, corpus: in3120.Corpus, wordlist: set[str], debug: bool = False) -> None:
+    def __init__(
+        self,
+        corpus: in3120.Corpus,
+        wordlist: set[str],
+        debug: bool = False,
+        index: Optional[WordleInvertedIndex] = None,
+    ) -> None:
         """
         class that, from a feedback and the guessed word, returns a list of indices of all the possible words using get_possible_matches()
+
+        The inverted index is never modified, so one index from build_index() can be shared by any number of games.
+        Each engine only holds its own pruned view of the posting lists.
         """
         self._corpus = corpus
         self.wordlist = wordlist
-        self.inverted_index = WordleInvertedIndex(corpus)
+        self.inverted_index = index if index is not None else self.build_index(corpus)
+        self.posting_lists = self.inverted_index.posting_lists
         self.debug = debug
 
+    @staticmethod
+    def build_index(corpus: in3120.Corpus) -> WordleInvertedIndex:
+        return WordleInvertedIndex(corpus)
+
+    @staticmethod
+    def load_index(corpus: in3120.Corpus, data: bytes) -> WordleInvertedIndex:
+        return WordleInvertedIndex.from_bytes(corpus, data)
+
     def _green(
         self, unwanted_terms: Set, position: int, char: str
     ) -> Set[Tuple[str, int]]:
         # returns all the words having a different letter at this position
-        for term, pos in self.inverted_index.posting_lists.keys():
+        for term, pos in self.posting_lists.keys():
             if pos == position and term != char:
                 unwanted_terms.add((term, pos))
         return unwanted_terms
@@ -35,15 +55,15 @@ class SolverSearchEngine:
 
     def _gray(self, unwanted_terms: Set, char: str) -> Set[Tuple[str, int]]:
         # returns all the words having this letter
-        for term, pos in self.inverted_index.posting_lists.keys():
+        for term, pos in self.posting_lists.keys():
             if term == char:
                 unwanted_terms.add((term, pos))
         return unwanted_terms
 
-    def _get_letter_counts(self, feedback):
+    def _get_letter_counts(self, code: int, guess: str):
         """
         letter counts: all the letters that have to be included and that the amount of them
-        for the feedback [('a', '0'), ('b', '1'), ('a', '2'), ('c', '2'), ('k', '2')]
+        for the guess "aback" with the feedback code 0 + 1*3 + 2*9 + 2*27 + 2*81 (gray, yellow, green, green, green)
         we have:
 
         letter: (number of non-gray; number of gray)
@@ -55,18 +75,19 @@ class SolverSearchEngine:
         }
 
         """
-        correct = [c for c, n in feedback if n != "0"]
-        counter_1 = Counter(c for c, _ in feedback)
-        counter_2 = Counter(c for c, n in feedback if n == "0")
-
-        return {c: (counter_1[c], counter_2[c]) for c in correct if c in correct}
+        statuses = STATUSES[code]
+        letter_counts = {}
+        for c, status in zip(guess, statuses):
+            if status != GRAY and c not in letter_counts:
+                grays = sum(1 for d, n in zip(guess, statuses) if d == c and n == GRAY)
+                letter_counts[c] = (guess.count(c), grays)
+        return letter_counts
 
     def _update_index(
-        self, feedback, guess
-    ) -> Dict[Tuple[str, int], List[in3120.Posting]]:
-        # Example feedback format: [('a', '0'), ('b', '1'), ('a', '2'), ('c', '2'), ('k', '2')]
+        self, code: int, guess: str
+    ) -> Dict[Tuple[str, int], array]:
+        # code is a feedback code from feedbackmatrix, STATUSES[code] gives the status of every position
         unwanted_terms = set()
-        char_counts = Counter(guess)
 
         """
         checks if in the frontier:
@@ -79,12 +100,12 @@ class SolverSearchEngine:
         
         """
 
-        for i, (c, score) in enumerate(feedback):
-            if score == "2":
+        for i, (c, status) in enumerate(zip(guess, STATUSES[code])):
+            if status == GREEN:
                 self._green(unwanted_terms, i, c)
-            elif score == "1":
+            elif status == YELLOW:
                 self._yellow(unwanted_terms, i, c)
-            elif score == "0" and char_counts[c] > 1:
+            elif guess.count(c) > 1:
                 self._yellow(unwanted_terms, i, c)
             else:
                 self._gray(unwanted_terms, c)
@@ -92,7 +113,7 @@ class SolverSearchEngine:
         # returns the inverted index posting lists pruned from the unwanted posting lists
         return {
             k: v
-            for k, v in self.inverted_index.posting_lists.items()
+            for k, v in self.posting_lists.items()
             if k not in unwanted_terms
         }
 
@@ -111,22 +132,22 @@ class SolverSearchEngine:
     def _merge(self, letter_counts) -> List[int]:
         # 5-out-of-N AND
         result = []
-        posting_lists = [iter(p) for p in self.inverted_index.posting_lists.values()]
+        posting_lists = [iter(p) for p in self.posting_lists.values()]
 
         required_minimum = 5
 
-        all_cursors = [next(p, None) for p in posting_lists]  # all postings of a layer
+        all_cursors = [next(p, None) for p in posting_lists]  # all word ids of a layer
         remaining_cursor_ids = [
-            i for i in range(len(all_cursors)) if all_cursors[i]
+            i for i in range(len(all_cursors)) if all_cursors[i] is not None
         ]  # remaining posting_list iter (not none)
 
         while len(remaining_cursor_ids) >= required_minimum:
 
-            document_id = min(all_cursors[i].document_id for i in remaining_cursor_ids)
+            document_id = min(all_cursors[i] for i in remaining_cursor_ids)
             frontier_cursor_ids = [
                 i
                 for i in remaining_cursor_ids
-                if all_cursors[i].document_id == document_id
+                if all_cursors[i] == document_id
             ]
 
             if len(frontier_cursor_ids) >= required_minimum:
@@ -141,17 +162,17 @@ class SolverSearchEngine:
             for i in frontier_cursor_ids:
                 all_cursors[i] = next(posting_lists[i], None)
             remaining_cursor_ids = [
-                i for i in range(len(all_cursors)) if all_cursors[i]
+                i for i in range(len(all_cursors)) if all_cursors[i] is not None
             ]
 
         # returns a list of word indices
         if self.debug: print(result)
         return result
 
-    def get_possible_matches(self, feedback, guess):
-        # should be called after every step of the wordler solver
-        self.inverted_index.posting_lists = self._update_index(feedback, guess)
-        letter_counts = self._get_letter_counts(feedback)
+    def get_possible_matches(self, code: int, guess: str):
+        # should be called after every step of the wordler solver, with the feedback code of the guess
+        self.posting_lists = self._update_index(code, guess)
+        letter_counts = self._get_letter_counts(code, guess)
         if self.debug: print(letter_counts)
         return self._merge(letter_counts)
 
@@ -167,7 +188,7 @@ def test_corpus():
     solverengine = SolverSearchEngine(corpus, wordlist)
 
     feedback = [("a", "0"), ("b", "1"), ("a", "2"), ("c", "2"), ("k", "2")]
-    result = solverengine.get_possible_matches(feedback, guess)
+    result = solverengine.get_possible_matches(encode_feedback(feedback), guess)
     for i in result:
         print(corpus[i])
 
@@ -197,6 +218,6 @@ def test_behaviors():
 
     for i in range(4):
         solverengine = SolverSearchEngine(corpora[i], wordlist)
-        result = solverengine.get_possible_matches(feedbacks[i], "speed")
+        result = solverengine.get_possible_matches(encode_feedback(feedbacks[i]), "speed")
         for j in result:
             print(corpora[i][j])
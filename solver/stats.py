@@ -0,0 +1,6 @@
+def percentile(samples, q: float) -> float:
+    """
+    The nearest-rank q-th percentile (0 to 100) of the samples.
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
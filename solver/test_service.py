@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from feedbackmatrix import score_guess
+
+"""
+Run from the solver directory:
+    python -m unittest test_service
+"""
+
+SOLVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ServiceStdioTest(unittest.TestCase):
+
+    def serve(self, lines) -> dict:
+        # stdin redirected from a regular file, as with: python service.py < requests.jsonl
+        with tempfile.TemporaryFile("w+b") as requests:
+            requests.write("".join(line + "\n" for line in lines).encode("utf-8"))
+            requests.seek(0)
+            result = subprocess.run(
+                [sys.executable, "service.py", "--engine", "bitset"],
+                stdin=requests, capture_output=True, cwd=SOLVER_DIR, timeout=300, check=True,
+            )
+        responses = [json.loads(line) for line in result.stdout.decode("utf-8").splitlines()]
+        return {response["id"]: response for response in responses}
+
+    def test_requests_from_a_file(self):
+        responses = self.serve([
+            json.dumps({"id": 1, "history": []}),
+            json.dumps({"id": 2, "history": [["slate", score_guess("slate", "crane")]]}),
+            json.dumps({"id": 3, "history": [["slate", True]]}),
+            "not json",
+        ])
+        self.assertEqual(sorted(responses, key=str), [1, 2, 3, None])
+        self.assertEqual(responses[1]["guess"], "slate")
+        self.assertIsInstance(responses[2]["guess"], str)
+        self.assertLess(responses[2]["candidates"], 2315)
+        self.assertIn("error", responses[3])
+        self.assertIn("error", responses[None])
+
+
+class ServiceErrorTest(unittest.TestCase):
+
+    def test_failed_suggestion_answers_every_waiting_request(self):
+        from bitsetengine import BitsetSearchEngine
+        from service import SolverService
+        from wordlesolver import WordleModel
+
+        service = SolverService(WordleModel(engine_class=BitsetSearchEngine), threads=1)
+
+        def fail(history):
+            raise RuntimeError("broken")
+
+        service.suggest = fail
+        line = json.dumps({"id": 1, "history": [["slate", 0]]})
+
+        async def requests():
+            # the same history twice, so the second request waits on the first one's suggestion
+            return await asyncio.gather(service.respond(line), service.respond(line))
+
+        responses = [json.loads(response) for response in asyncio.run(requests())]
+        self.assertEqual(service.coalesced, 1)
+        self.assertTrue(all("broken" in response["error"] for response in responses))
+        self.assertEqual(service._in_flight, {})
+        self.assertEqual(len(service.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
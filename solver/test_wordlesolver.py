@@ -0,0 +1,43 @@
+import contextlib
+import io
+import unittest
+
+from bitsetengine import BitsetSearchEngine
+from wordlesolver import WordleModel, WordleSolver
+
+"""
+Run from the solver directory:
+    python -m unittest test_wordlesolver
+"""
+
+
+class SolveManyTest(unittest.TestCase):
+
+    def test_latency_budget_goes_through_the_selector(self):
+        # a budget long enough for every tier, so the guesses don't depend on timing
+        for strategy in ("cosine", "frequency"):
+            reports = []
+            solver = WordleSolver(
+                engine_class=BitsetSearchEngine, strategy=strategy, use_opening_book=False,
+                latency_budget=10.0, timing_hook=reports.append,
+            )
+            words = solver.words[::25]
+            with contextlib.redirect_stdout(io.StringIO()):
+                looped = []
+                for word in words:
+                    solver.reset(word)
+                    looped.append(solver.solve())
+            before = len(reports)
+            self.assertEqual(solver.solve_many(words), looped, strategy)
+            self.assertGreater(len(reports), before, strategy)
+
+    def test_sessions_share_the_tier_costs(self):
+        model = WordleModel(engine_class=BitsetSearchEngine, strategy="frequency", latency_budget=10.0)
+        first, second = model.new_session(), model.new_session()
+        self.assertIs(first.selector._costs, second.selector._costs)
+        first.selector.select(first.candidates)
+        self.assertTrue(all(second.selector._costs[name] for name, _ in second.selector.tiers))
+
+
+if __name__ == "__main__":
+    unittest.main()
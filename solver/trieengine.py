@@ -0,0 +1,104 @@
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from context import in3120
+from constraints import ALL_LETTERS, letter_bounds, narrow_positions
+from feedbackmatrix import WORD_LENGTH
+
+"""
+Serialized form of a TrieIndex: header only, magic b"WTI1" | number of words (uint32).
+The trie is rebuilt from the corpus on load, which takes milliseconds.
+"""
+
+MAGIC = b"WTI1"
+HEADER = struct.Struct("<4sI")
+
+
+class TrieIndex:
+    def __init__(self, corpus: in3120.Corpus) -> None:
+        """
+        An in3120.Trie of the words of a corpus, with the document id of every word as its meta data.
+        Read-only once built, so a single index can be shared by every game.
+        """
+        self.size = corpus.size()
+        self.trie = in3120.Trie.from_strings2(
+            ((document.get_field("body", ""), document.document_id) for document in corpus),
+            in3120.DummyNormalizer(),
+            in3120.DummyTokenizer(),
+        )
+
+    def to_bytes(self) -> bytes:
+        return HEADER.pack(MAGIC, self.size)
+
+    @staticmethod
+    def from_bytes(corpus: in3120.Corpus, data: bytes) -> "TrieIndex":
+        magic, size = HEADER.unpack_from(data)
+        assert magic == MAGIC and size == corpus.size(), "not a serialized TrieIndex for this corpus"
+        return TrieIndex(corpus)
+
+
+class TrieSearchEngine:
+    def __init__(
+        self,
+        corpus: in3120.Corpus,
+        wordlist: set[str],
+        debug: bool = False,
+        index: Optional[TrieIndex] = None,
+    ) -> None:
+        """
+        Drop-in alternative to SolverSearchEngine that gives the same results from get_possible_matches(),
+        by walking a trie of the words with the constraints instead of merging posting lists.
+        A branch is cut as soon as its prefix breaks a constraint: a letter not allowed at its position, too many
+        copies of a letter, or too few positions left for the letters still required. So the walk visits the
+        prefixes of the surviving words and their immediate dead ends, not the whole word list.
+        The only per-game state is the allowed letters per position.
+        """
+        self._corpus = corpus
+        self.wordlist = wordlist
+        self.debug = debug
+        self.index = index if index is not None else self.build_index(corpus)
+        # like the pruned posting lists, the positional constraints of every feedback so far
+        self.masks = [ALL_LETTERS] * WORD_LENGTH
+
+    @staticmethod
+    def build_index(corpus: in3120.Corpus) -> TrieIndex:
+        return TrieIndex(corpus)
+
+    @staticmethod
+    def load_index(corpus: in3120.Corpus, data: bytes) -> TrieIndex:
+        return TrieIndex.from_bytes(corpus, data)
+
+    def _walk(self, bounds: Dict[str, Tuple[int, int]]) -> List[int]:
+        masks = self.masks
+        required = sum(low for low, _ in bounds.values())
+        result = []
+        # (node, prefix, copies of required letters the prefix is still missing)
+        stack = [(self.index.trie, "", required)]
+        while stack:
+            node, prefix, missing = stack.pop()
+            depth = len(prefix)
+            if depth == WORD_LENGTH:
+                if node.is_final():
+                    result.append(node.get_meta())
+                continue
+            for c in node.transitions():
+                if not masks[depth] >> (ord(c) - ord("a")) & 1:
+                    continue
+                n = prefix.count(c) + 1
+                low, high = bounds.get(c, (0, WORD_LENGTH))
+                if n > high:
+                    continue
+                left = missing - 1 if n <= low else missing
+                if left > WORD_LENGTH - depth - 1:
+                    continue
+                stack.append((node.child(c), prefix + c, left))
+        result.sort()
+        return result
+
+    def get_possible_matches(self, code: int, guess: str) -> List[int]:
+        # should be called after every step of the wordler solver, with the feedback code of the guess,
+        # the letter counts only come from the latest feedback, as in SolverSearchEngine
+        self.masks = narrow_positions(self.masks, guess, code)
+        result = self._walk(letter_bounds(guess, code))
+        if self.debug: print(result)
+        return result
@@ -1,26 +1,82 @@
-from bisect import insort
-from collections import Counter, defaultdict
+import struct
+import sys
+from array import array
+from typing import Dict, Optional, Tuple
 
 from context import in3120
 
+"""
+Serialized form, all integers little-endian, word ids as uint32 whatever the host's array('I') is:
+    header:  magic b"WII1" | number of posting lists (uint32)
+    list:    letter (1 ascii byte) | position (uint8) | number of word ids n (uint32) | n word ids
+"""
+
+MAGIC = b"WII1"
+HEADER = struct.Struct("<4sI")
+LIST_HEADER = struct.Struct("<cBI")
+ID_SIZE = 4
+# on the usual hosts array('I') already is little-endian uint32, and is copied as is
+NATIVE_IDS = sys.byteorder == "little" and array("I").itemsize == ID_SIZE
+
+
+def ids_to_bytes(posting_list: array) -> bytes:
+    if NATIVE_IDS:
+        return posting_list.tobytes()
+    return struct.pack(f"<{len(posting_list)}I", *posting_list)
+
+
+def ids_from_bytes(data: bytes, offset: int, n: int) -> array:
+    if NATIVE_IDS:
+        posting_list = array("I")
+        posting_list.frombytes(data[offset:offset + ID_SIZE * n])
+        return posting_list
+    return array("I", struct.unpack_from(f"<{n}I", data, offset))
+
 
 class WordleInvertedIndex:
 
-    def __init__(self, corpus: in3120.Corpus):
+    def __init__(
+        self,
+        corpus: in3120.Corpus,
+        posting_lists: Optional[Dict[Tuple[str, int], array]] = None,
+    ):
+        """
+        Positional letter index: (letter, position) -> sorted array('I') of the ids of the words with that letter there.
+        Pass posting_lists, e.g., from from_bytes(), to skip building.
+        """
         self.corpus = corpus
-        self.posting_lists = defaultdict(list)
-        self.build_index()
+        self.posting_lists: Dict[Tuple[str, int], array] = {}
+        if posting_lists is None:
+            self.build_index()
+        else:
+            self.posting_lists = posting_lists
 
     def build_index(self) -> None:
+        # word ids arrive in increasing order, so appending keeps every posting list sorted
         for i, document in enumerate(self.corpus):
             w = document.get_field("body", "")
-            term_freq = Counter(w)
-
             for pos, c in enumerate(w):
-                self._append_to_posting_list(c, pos, i, term_freq[c])
+                posting_list = self.posting_lists.get((c, pos))
+                if posting_list is None:
+                    posting_list = self.posting_lists[(c, pos)] = array("I")
+                posting_list.append(i)
+
+    def to_bytes(self) -> bytes:
+        chunks = [HEADER.pack(MAGIC, len(self.posting_lists))]
+        for (letter, pos), posting_list in sorted(self.posting_lists.items()):
+            chunks.append(LIST_HEADER.pack(letter.encode("ascii"), pos, len(posting_list)))
+            chunks.append(ids_to_bytes(posting_list))
+        return b"".join(chunks)
 
-    def _append_to_posting_list(
-        self, letter: str, pos: int, word_id: int, tf: int
-    ) -> None:
-        posting_list = self.posting_lists[(letter, pos)]
-        insort(posting_list, in3120.Posting(word_id, tf), key=lambda x: x.document_id)
+    @staticmethod
+    def from_bytes(corpus: in3120.Corpus, data: bytes) -> "WordleInvertedIndex":
+        magic, count = HEADER.unpack_from(data)
+        assert magic == MAGIC, "not a serialized WordleInvertedIndex"
+        posting_lists = {}
+        offset = HEADER.size
+        for _ in range(count):
+            letter, pos, n = LIST_HEADER.unpack_from(data, offset)
+            offset += LIST_HEADER.size
+            posting_lists[(letter.decode("ascii"), pos)] = ids_from_bytes(data, offset, n)
+            offset += ID_SIZE * n
+        return WordleInvertedIndex(corpus, posting_lists)
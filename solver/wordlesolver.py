@@ -1,7 +1,39 @@
-from copy import deepcopy, copy
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
 
 from context import in3120
-from solver.solverengine import SolverSearchEngine
+from absurdle import AbsurdleHost
+from anytime import AnytimeSelector, letter_scores
+from batchengine import BatchSearchEngine
+from feedbackmatrix import SOLVED, FeedbackMatrix, decode_feedback, read_words, score_guess, wordlist_hash
+from gametrace import BOOK, LIVE, OPENER, GameTrace
+from guessscorer import EntropyScorer
+from letterfrequency import LetterFrequencies, letter_matrix
+from lookahead import LookaheadSearch
+from openingbook import OpeningBook, book_key, book_path
+from parallelscorer import ParallelScorer
+from sampledscorer import SampledEntropyScorer
+from snapshot import Snapshot, save_snapshot, snapshot_path
+from solverengine import SolverSearchEngine
+
+# how guess_word picks: the candidate least similar to the previous guess, the candidate of the most frequent letters,
+# the guess that splits the candidates best, or a LookaheadSearch minimizing the expected / worst-case guesses
+STRATEGIES = ("cosine", "frequency", "entropy", "expected_size", "lookahead", "lookahead_worst")
+
+
+def intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    The ids in both of two sorted id arrays, sorted. Binary searches the smaller one into the larger one,
+    so it costs O(small * log(large)) and never re-sorts.
+    """
+    small, large = (a, b) if len(a) <= len(b) else (b, a)
+    if not len(small) or not len(large):
+        return small[:0]
+    positions = np.minimum(np.searchsorted(large, small), len(large) - 1)
+    return small[large[positions] == small]
 
 """
 Plan:
@@ -11,98 +43,385 @@ Plan:
 """
 
 
-class WordleSolver:
-    def __init__(self, debug: bool = False):
+class WordleModel:
+    def __init__(
+        self,
+        debug: bool = False,
+        use_feedback_matrix: bool = True,
+        engine_class=SolverSearchEngine,
+        strategy: str = "cosine",
+        use_opening_book: bool = True,
+        use_snapshot: bool = True,
+        lookahead_depth: int = 3,
+        move_budget: float = 1.0,
+        latency_budget: Optional[float] = None,
+        timing_hook: Optional[Callable[[dict], None]] = None,
+        approximate: bool = False,
+        workers: int = 1,
+    ):
         """
-        Initialize the Wordle solver with a list of valid words.
+        Everything about the solver that doesn't change during a game, loaded once and shared read-only by any number
+        of GameSessions, also from different threads. strategy is one of STRATEGIES.
         """
         self.debug = debug
-        self.corpus = in3120.InMemoryCorpus(filenames="answer-words.txt")
+        self.engine_class = engine_class
+        self.strategy = strategy
+        self.approximate = approximate
+        self.latency_budget = latency_budget
+        self.timing_hook = timing_hook
+        # the AnytimeSelector tier costs, learned by all the sessions
+        self.tier_costs = {}
+        # built once and cached next to the word lists, later runs just memory-map it
+        self.feedback_matrix = FeedbackMatrix.from_files() if use_feedback_matrix else None
+        self.scorer = None
+        self.parallel_scorer = None
+        self.search = None
+        assert strategy in STRATEGIES, f"unknown strategy '{strategy}'"
+        if strategy not in ("cosine", "frequency"):
+            assert self.feedback_matrix is not None, f"the {strategy} strategy needs the feedback matrix"
+            self.scorer = EntropyScorer(self.feedback_matrix)
+            if workers > 1:
+                self.parallel_scorer = ParallelScorer(self.feedback_matrix, workers)
+        if strategy.startswith("lookahead"):
+            criterion = "worst" if strategy == "lookahead_worst" else "expected"
+            self.search = LookaheadSearch(self.scorer, lookahead_depth, criterion=criterion, move_budget=move_budget)
+        # the lookahead's transposition table is shared by every session, one search at a time
+        self.search_lock = threading.Lock()
+        # for everything built on first use: the in3120 indexes, the vectorizer and the batch engine
+        self._lazy_lock = threading.RLock()
         self.tokenizer = in3120.UnigramTokenizer()
-        self.invertedindex = in3120.InMemoryInvertedIndex(
-            corpus=self.corpus,
-            normalizer=in3120.SimpleNormalizer(),
-            tokenizer=self.tokenizer,
-            fields=["body"],
-        )
-        self.wordindex = in3120.InMemoryInvertedIndex(
-            corpus=self.corpus,
-            normalizer=in3120.SimpleNormalizer(),
-            tokenizer=in3120.SimpleTokenizer(),
-            fields=["body"],
-        )
-        self.vectorizer = in3120.Vectorizer(
-            self.corpus, self.invertedindex, in3120.Trie()
-        )
+        self._invertedindex = None
+        self._wordindex = None
+        self._vectorizer = None
+        self._batch_engine = None
+
+        self.snapshot = None
+        snapshot = None
+        if use_snapshot:
+            key = wordlist_hash(read_words("answer-words.txt"))
+            snapshot = Snapshot.open(snapshot_path(key), key)
+        if snapshot is not None:
+            self._restore(snapshot)
+        else:
+            self._build()
+            if use_snapshot:
+                save_snapshot(snapshot_path(key), key, self._snapshot_sections())
+        self.letter_scores = letter_scores(self.words)
+        # the tables over all the answers, every session recounts a copy of them
+        self.letter_frequencies = None
+        if strategy == "frequency":
+            self.letter_frequencies = LetterFrequencies(letter_matrix(self.words), self.all_ids)
+
+        self.opener = "slate"
+        self.opening_book = None
+        if use_opening_book:
+            self.opening_book = OpeningBook.load(book_path(strategy), self.opening_book_key())
+
+    def new_session(self, target_word: Optional[str] = None, trace: Optional[GameTrace] = None) -> "GameSession":
+        session = GameSession(self, trace)
+        if target_word is not None:
+            session.reset(target_word)
+        return session
+
+    def _build(self) -> None:
+        self.corpus = in3120.InMemoryCorpus(filenames="answer-words.txt")
         self.all_words = set(self.wordindex.get_indexed_terms())
+        self.words = [document.get_field("body", "") for document in self.corpus]
+        self.word_ids = {word: i for i, word in enumerate(self.words)}
+        self.all_ids = np.arange(len(self.words), dtype=np.int32)
+        self.vocabulary = {term: i for i, term in enumerate(sorted(self.invertedindex.get_indexed_terms()))}
+        self.word_matrix, self.word_norms = self._build_word_matrix()
+        # built once and shared read-only by every game, each game only gets a lightweight engine on top of it
+        self.engine_index = self.engine_class.build_index(self.corpus)
+
+    def _snapshot_sections(self) -> dict[str, bytes]:
+        return {
+            "words": "\n".join(self.words).encode("utf-8"),
+            "vocabulary": "\n".join(self.vocabulary).encode("utf-8"),
+            "idf": self.idf.tobytes(),
+            "word_matrix": self.word_matrix.tobytes(),
+            "word_norms": self.word_norms.tobytes(),
+            f"index:{self.engine_class.__name__}": self.engine_index.to_bytes(),
+        }
 
-        self.candidates = copy(self.all_words)
-        self.word_vectors = self._cache_word_vectors()
+    def _restore(self, snapshot: Snapshot) -> None:
+        """
+        The counterpart of _build() and _snapshot_sections(). The arrays are views into the memory-mapped snapshot,
+        the in3120 indexes and the vectorizer are only rebuilt if someone asks for them.
+        """
+        words = str(snapshot.get_bytes("words"), "utf-8").split("\n")
+        self.corpus = in3120.InMemoryCorpus()
+        for i, word in enumerate(words):
+            self.corpus.add_document(in3120.InMemoryDocument(i, {"body": word}))
+        self.all_words = set(words)
+        self.words = words
+        self.word_ids = {word: i for i, word in enumerate(words)}
+        self.all_ids = np.arange(len(words), dtype=np.int32)
+        self.vocabulary = {term: i for i, term in enumerate(str(snapshot.get_bytes("vocabulary"), "utf-8").split("\n"))}
+        self.idf = snapshot.get_array("idf", np.float64)
+        self.word_matrix = snapshot.get_array("word_matrix", np.float64, (len(words), len(self.vocabulary)))
+        self.word_norms = snapshot.get_array("word_norms", np.float64)
+        section = f"index:{self.engine_class.__name__}"
+        if section in snapshot:
+            self.engine_index = self.engine_class.load_index(self.corpus, snapshot.get_bytes(section))
+        else:
+            # first run with this engine, add its index to the snapshot for the next process
+            self.engine_index = self.engine_class.build_index(self.corpus)
+            sections = {name: bytes(snapshot.get_bytes(name)) for name in snapshot.sections}
+            sections[section] = self.engine_index.to_bytes()
+            save_snapshot(snapshot.path, snapshot.key, sections)
+        self.snapshot = snapshot
 
-        self.engine = SolverSearchEngine(self.corpus, self.candidates, self.debug)
+    @property
+    def invertedindex(self) -> in3120.InvertedIndex:
+        with self._lazy_lock:
+            if self._invertedindex is None:
+                self._invertedindex = in3120.InMemoryInvertedIndex(
+                    corpus=self.corpus,
+                    normalizer=in3120.SimpleNormalizer(),
+                    tokenizer=self.tokenizer,
+                    fields=["body"],
+                )
+        return self._invertedindex
 
+    @property
+    def wordindex(self) -> in3120.InvertedIndex:
+        with self._lazy_lock:
+            if self._wordindex is None:
+                self._wordindex = in3120.InMemoryInvertedIndex(
+                    corpus=self.corpus,
+                    normalizer=in3120.SimpleNormalizer(),
+                    tokenizer=in3120.SimpleTokenizer(),
+                    fields=["body"],
+                )
+        return self._wordindex
+
+    @property
+    def vectorizer(self) -> in3120.Vectorizer:
+        with self._lazy_lock:
+            if self._vectorizer is None:
+                self._vectorizer = in3120.Vectorizer(self.corpus, self.invertedindex, in3120.Trie())
+        return self._vectorizer
+
+    @property
+    def batch_engine(self) -> BatchSearchEngine:
+        with self._lazy_lock:
+            if self._batch_engine is None:
+                self._batch_engine = BatchSearchEngine(self.corpus)
+        return self._batch_engine
+
+    def ranker(self) -> in3120.WordleRanker:
+        """
+        A WordleRanker over the answer words that reuses word_ids and the rows of the TF-IDF word matrix.
+        """
+        unit_vectors = self.word_matrix / np.where(self.word_norms > 0, self.word_norms, 1.0)[:, None]
+        return in3120.WordleRanker(self.corpus, self.invertedindex, self.vectorizer, self.word_ids, unit_vectors)
+
+    def opening_book_key(self) -> str:
+        answers = self.words
+        guesses = self.feedback_matrix.guesses if self.feedback_matrix is not None else read_words("valid-words.txt")
+        return book_key(guesses, answers, self.strategy, self.opener, self.book_settings())
+
+    def book_settings(self) -> list[str]:
+        """
+        The settings besides the strategy that change the moves, a book built with other ones doesn't apply.
+        """
+        settings = [f"latency_budget={self.latency_budget}"]
+        if self.search is not None:
+            settings += [f"lookahead_depth={self.search.depth}", f"move_budget={self.search.move_budget}"]
+        elif self.scorer is not None:
+            settings.append(f"approximate={self.approximate}")
+        return settings
+
+    def _letter_counts(self, word: str) -> np.ndarray:
+        counts = np.zeros(len(self.vocabulary))
+        for c in word:
+            if c in self.vocabulary:
+                counts[self.vocabulary[c]] += 1
+        return counts
+
+    def _tfidf(self, counts: np.ndarray) -> np.ndarray:
+        # the same TF-IDF weights as Vectorizer.from_document, one column per letter
+        return np.where(counts > 0, (1.0 + np.log10(np.maximum(counts, 1.0))) * self.idf, 0.0)
+
+    def _build_word_matrix(self):
+        """
+        Dense (words x letters) TF-IDF matrix for all words in the corpus, row i is document i,
+        together with the length of every row.
+        """
+        document_frequencies = np.array(
+            [self.invertedindex.get_document_frequency(term) for term in self.vocabulary], dtype=np.float64
+        )
+        self.idf = np.log10(self.corpus.size() / document_frequencies)
+        counts = np.array([self._letter_counts(word) for word in self.words])
+        matrix = self._tfidf(counts)
+        return matrix, np.linalg.norm(matrix, axis=1)
+
+    def _word_vector(self, word: str):
+        if word in self.word_ids:
+            i = self.word_ids[word]
+            return self.word_matrix[i], self.word_norms[i]
+        vector = self._tfidf(self._letter_counts(word))
+        return vector, np.linalg.norm(vector)
+
+    def _cosines(self, ids: np.ndarray, guess: str) -> np.ndarray:
+        """
+        Cosine between the guess and every candidate id, as one matrix-vector product.
+        """
+        vector, norm = self._word_vector(guess)
+        denominators = self.word_norms[ids] * norm
+        # a row-wise sum rather than BLAS, so anagrams get bit-identical cosines and ties keep the candidate order
+        dots = (self.word_matrix[ids] * vector).sum(axis=1)
+        return np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators != 0)
+
+    def rank_candidates_by_similarity(self, candidate_ids: np.ndarray, guess: str) -> list[str]:
+        order = np.argsort(self._cosines(candidate_ids, guess), kind="stable")
+        return [self.words[i] for i in candidate_ids[order]]
+
+    def _least_similar_many(self, candidates: np.ndarray, guesses: list[str]) -> list:
+        """
+        guess_word() with the cosine strategy for many games: for every row of the (games x words) candidate matrix,
+        the candidate least similar to that game's previous guess, or None if there are no candidates.
+        """
+        vectors, norms = zip(*(self._word_vector(guess) for guess in guesses))
+        vectors, norms = np.array(vectors), np.array(norms)
+        games, ids = np.nonzero(candidates)  # (game, candidate) pairs, grouped by game and in id order
+        # the same row-wise sums as _cosines(), so ties break the same way
+        dots = (self.word_matrix[ids] * vectors[games]).sum(axis=1)
+        denominators = self.word_norms[ids] * norms[games]
+        cosines = np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators != 0)
+
+        best = [None] * len(guesses)
+        if len(games):
+            starts = np.flatnonzero(np.r_[True, games[1:] != games[:-1]])
+            minimums = np.minimum.reduceat(cosines, starts)
+            at_minimum = np.flatnonzero(cosines == np.repeat(minimums, np.diff(np.r_[starts, len(games)])))
+            # the first pair at the minimum of every game
+            firsts = at_minimum[np.r_[True, games[at_minimum][1:] != games[at_minimum][:-1]]]
+            for game, i in zip(games[firsts], ids[firsts]):
+                best[game] = self.words[i]
+        return best
+
+
+class GameSession:
+    def __init__(self, model: WordleModel, trace: Optional[GameTrace] = None):
+        """
+        The state of one game on top of a shared WordleModel: the target word, the previous guess, the candidates and
+        the engine, plus the few helpers that keep per-game state. Cheap to create, and sessions on the same model can
+        run from different threads, as they only read the model.
+        With a trace, every turn of solve() is appended to that GameTrace log.
+        """
+        self.model = model
+        self.trace = trace
+        self.sampled_scorer = None
+        if model.scorer is not None:
+            matrix = model.feedback_matrix
+            self.sampled_scorer = SampledEntropyScorer(matrix.guesses, matrix.answers, model.scorer)
+        self.opener = model.opener
+        self.selector = None
+        if model.latency_budget is not None:
+            self.selector = AnytimeSelector(self._tiers(), model.latency_budget, model.timing_hook, model.tier_costs)
+        self.reset("")
         self.target_word = None
-        self.guess = "slate"
-
-    def _cache_word_vectors(self):
-        """
-        Cache vector representations for all words in the corpus.
-        """
-        cache = {}
-        for word in self.candidates:
-            document_id = list(self.wordindex[word])[0].document_id
-            cache[word] = self.vectorizer.from_document(
-                self.corpus.get_document(document_id), ["body"]
-            )
-        return cache
-
-    def rank_candidates_by_similarity(self, candidates: set[str], guess: str):
-        return [
-            candidate
-            for candidate, _ in sorted(
-                [
-                    (
-                        candidate,
-                        self.word_vectors[guess].cosine(self.word_vectors[candidate]),
-                    )
-                    for candidate in candidates
-                ],
-                key=lambda x: x[1],
-            )
-        ]
-
-    def filter_candidates(self, feedback, guess):
+
+    def filter_candidates(self, code: int, guess: str):
         """
         Filters candidates based on the feedback from a guess.
 
-        feedback is a list of tuples with (letter, status) where:
-        - '2' indicates green (correct position),
-        - '1' indicates yellow (wrong position),
-        - '0' indicates gray (letter not in word).
+        code is the feedback as a base-3 number, see feedbackmatrix, where position i contributes status * 3**i and:
+        - 2 indicates green (correct position),
+        - 1 indicates yellow (wrong position),
+        - 0 indicates gray (letter not in word).
+
+        The candidates are a sorted array of word ids, narrowed by intersecting them with the engine's matches,
+        which only apply the letter counts of the latest feedback. With the frequency strategy, the letter
+        frequency tables are recounted for them.
+        """
+        possible_ids = np.asarray(self.engine.get_possible_matches(code, guess), dtype=np.int32)
+        candidates = intersect_sorted(self.candidates, possible_ids)
+        if self.frequencies is not None:
+            self.frequencies.recount(candidates)
+        self.candidates = candidates
+
+    def _tiers(self) -> list:
+        """
+        The AnytimeSelector tiers for the strategy, cheapest first: a candidate made of common letters,
+        then the strategy's own scoring, for the scoring strategies first on a sample of large candidate sets.
         """
-        possible_docs = self.engine.get_possible_matches(feedback, guess)
-        self.candidates = [
-            self.corpus.get_document(doc_id).get_field("body", "")
-            for doc_id in possible_docs
-        ]
+        model = self.model
+        scores = model.letter_scores
+        tiers = [("heuristic", lambda ids, deadline: model.words[ids[int(np.argmax(scores[ids]))]])]
+        if model.strategy == "frequency":
+            tiers.append(("frequency", lambda ids, deadline: self._most_frequent(ids)))
+            return tiers
+        if model.scorer is None:
+            tiers.append(("cosine", lambda ids, deadline: self._least_similar(ids)))
+            return tiers
+
+        criterion = "entropy" if model.search is not None else model.strategy
+
+        def sampled(ids, deadline):
+            if len(ids) < self.sampled_scorer.exact_below:
+                return None  # the exact tier is about as fast
+            return self.sampled_scorer.best_guess(ids, criterion, deadline)
+
+        tiers.append(("sampled", sampled))
+        exact = model.parallel_scorer or model.scorer
+        tiers.append(("exact", lambda ids, deadline: exact.best_guess(ids, criterion, deadline)))
+        if model.search is not None:
+            tiers.append(("lookahead", lambda ids, deadline: self._search(ids, deadline - time.perf_counter())))
+        return tiers
+
+    def _least_similar(self, candidate_ids: np.ndarray):
+        # only the least similar candidate is needed, so no full sort
+        if not len(candidate_ids):
+            return None
+        return self.model.words[candidate_ids[int(np.argmin(self.model._cosines(candidate_ids, self.guess)))]]
+
+    def _most_frequent(self, candidate_ids: np.ndarray):
+        best = self.frequencies.best(candidate_ids)
+        return self.model.words[best] if best is not None else None
 
     def guess_word(self):
         """
         Make the next guess from the list of ranked candidates.
         """
-        ranked_candidates = self.rank_candidates_by_similarity(
-            self.candidates, self.guess
-        )
+        if self.selector is not None:
+            if not len(self.candidates):
+                return None
+            return self.selector.select(self.candidates)
+        if self.model.scorer is not None:
+            # word ids are answer ids, both are line numbers in answer-words.txt
+            return self._best_guess(self.candidates)
+        if self.frequencies is not None:
+            return self._most_frequent(self.candidates)
+
+        return self._least_similar(self.candidates)
+
+    def _search(self, candidate_ids: np.ndarray, budget: Optional[float] = None):
+        with self.model.search_lock:
+            return self.model.search.best_guess(candidate_ids, budget)
 
-        return ranked_candidates[0] if ranked_candidates else None
+    def _best_guess(self, candidate_ids: np.ndarray):
+        model = self.model
+        if model.search is not None:
+            return self._search(candidate_ids)
+        if model.approximate:
+            return self.sampled_scorer.best_guess(candidate_ids, model.strategy)
+        if model.parallel_scorer is not None:
+            return model.parallel_scorer.best_guess(candidate_ids, model.strategy)
+        return model.scorer.best_guess(candidate_ids, model.strategy)
 
     def solve(self, max_attempts=6):
         """
         Solve the Wordle game by iterating through guesses until the solution is found
         or maximum attempts are reached.
         """
-        if self.target_word is None:
+        if self.target_word is None and self.host is None:
             print("Target word not set, exiting")
+        history = b""  # feedback codes so far, the key into the opening book
+        unfiltered = []  # (code, guess) pairs not yet applied to the candidates, filtering is skipped while in the book
+        game = self.trace.new_game() if self.trace is not None else None
         for attempt in range(max_attempts):
             """
             Tenkte at for hvert attempt, vi har en funksjon som bestemmer hvor mye vi skal explore.
@@ -112,7 +431,21 @@ class WordleSolver:
             Men når attempt er høy:
                 - velge ordet med høyest cosin likhet (Det er det den gjør allerede vel?)
             """
-            guess = self.guess if attempt == 0 else self.guess_word()
+            guess = self.guess if attempt == 0 else None
+            source = OPENER
+            filter_time = rank_time = 0.0
+            if guess is None and self.model.opening_book is not None:
+                guess = self.model.opening_book.get(history)
+                source = BOOK
+            if guess is None and attempt > 0:
+                source = LIVE
+                st = time.perf_counter()
+                for previous_code, previous_guess in unfiltered:
+                    self.filter_candidates(previous_code, previous_guess)
+                unfiltered.clear()
+                filter_time = time.perf_counter() - st
+                guess = self.guess_word()
+                rank_time = time.perf_counter() - st - filter_time
             if guess is None:
                 print("No valid candidates left.")
                 return {
@@ -122,9 +455,12 @@ class WordleSolver:
                 }
 
             print(f"Attempt {attempt + 1}: Guessing '{guess}'")
-            feedback = self.get_feedback(guess)
+            code = self.get_feedback_code(guess)
+            if game is not None:
+                candidates = len(self.candidates) if source == LIVE else 0
+                self.trace.append(game, attempt, source, code, self.target_word, guess, candidates, filter_time, rank_time)
 
-            if all(status == "2" for _, status in feedback):
+            if code == SOLVED:
                 print(f"Solution found in {attempt + 1} attempts: {guess}")
                 return {
                     "success": True,
@@ -132,10 +468,10 @@ class WordleSolver:
                     "target_word": self.target_word,
                 }
 
-            self.filter_candidates(feedback, guess)
+            unfiltered.append((code, guess))
+            history += bytes([code])
             self.guess = guess
 
-
         print("Max attempts reached. Solution not found.")
         return {
             "success": False,
@@ -143,37 +479,177 @@ class WordleSolver:
             "target_word": self.target_word,
         }
 
+    def solve_many(self, targets: list[str], max_attempts=6) -> list[dict]:
+        """
+        Solves a batch of games in lockstep, one turn for all of them at a time, and returns the same
+        result dicts as solve() would, in the order of the targets.
+
+        Feedback is read from the feedback matrix for all games at once, and candidates are filtered for
+        all games at once by the BatchSearchEngine. With the cosine strategy the guesses are chosen in batch too,
+        otherwise a guess is chosen as guess_word() would once per distinct (previous guess, candidates) pair, and
+        shared by the games at it. Under a latency budget that goes through the AnytimeSelector, so as with solve()
+        the guesses depend on timing.
+        Targets that aren't in the feedback matrix are solved one by one with solve().
+        """
+        model = self.model
+        assert model.feedback_matrix is not None, "solve_many needs the feedback matrix"
+        batch_engine = model.batch_engine
+        matrix = model.feedback_matrix
+        targets = [target.strip() for target in targets]
+        results = [None] * len(targets)
+
+        batch = []
+        for i, target in enumerate(targets):
+            if target in matrix.answer_ids:
+                batch.append(i)
+            else:
+                self.reset(target)
+                results[i] = self.solve(max_attempts)
+
+        # per active game: its index in targets, target id, previous guess, feedback history and candidates
+        games = np.array(batch, dtype=np.int64)
+        target_ids = np.array([matrix.answer_ids[targets[i]] for i in batch], dtype=np.int64)
+        previous = [self.opener] * len(batch)
+        histories = [b""] * len(batch)
+        allowed = batch_engine.new_games(len(batch))  # packed bitsets, see BatchSearchEngine
+        candidates = allowed.copy()
+
+        def choose(candidate_ids: np.ndarray, previous_guess: str):
+            # guess_word() for a set of candidates
+            if self.selector is not None:
+                self.guess = previous_guess  # what the cosine tier ranks against
+                if self.frequencies is not None:
+                    self.frequencies.recount(candidate_ids)  # what the frequency tier reads
+                return self.selector.select(candidate_ids) if len(candidate_ids) else None
+            if model.strategy != "frequency":
+                return self._best_guess(candidate_ids)
+            frequencies = model.letter_frequencies.copy()
+            frequencies.recount(candidate_ids)
+            best = frequencies.best(candidate_ids)
+            return model.words[best] if best is not None else None
+
+        for attempt in range(max_attempts):
+            if attempt == 0:
+                guesses = [self.opener] * len(games)
+            else:
+                book = model.opening_book
+                guesses = [book.get(h) if book is not None else None for h in histories]
+                live = [j for j, guess in enumerate(guesses) if guess is None]
+                if live and model.strategy == "cosine" and self.selector is None:
+                    live_candidates = batch_engine.unpack(candidates[live])
+                    for j, guess in zip(live, model._least_similar_many(live_candidates, [previous[j] for j in live])):
+                        guesses[j] = guess
+                elif live:
+                    # a guess only depends on the candidates and the previous guess, and games with the same feedback
+                    # history mostly share them, so every distinct pair is chosen for once
+                    keys = [(previous[j], candidates[j].tobytes()) for j in live]
+                    firsts = {}
+                    for j, key in zip(live, keys):
+                        firsts.setdefault(key, j)
+                    chosen = {
+                        key: choose(np.flatnonzero(row), previous[j])
+                        for (key, j), row in zip(firsts.items(), batch_engine.unpack(candidates[list(firsts.values())]))
+                    }
+                    for j, key in zip(live, keys):
+                        guesses[j] = chosen[key]
+
+            stuck = np.array([guess is None for guess in guesses], dtype=bool)
+            for i in games[stuck]:
+                results[i] = {"success": False, "attempts": attempt, "target_word": targets[i]}
+
+            guess_ids = np.array([matrix.guess_ids[guess] if guess is not None else 0 for guess in guesses])
+            codes = np.asarray(matrix.codes[guess_ids, target_ids])
+            solved = ~stuck & (codes == SOLVED)
+            for i in games[solved]:
+                results[i] = {"success": True, "attempts": attempt + 1, "target_word": targets[i]}
+
+            keep = np.flatnonzero(~stuck & ~solved)
+            games, target_ids, codes = games[keep], target_ids[keep], codes[keep]
+            previous = [guesses[j] for j in keep]
+            histories = [histories[j] + bytes([int(codes[n])]) for n, j in enumerate(keep)]
+            allowed, candidates = allowed[keep], candidates[keep]
+            if not len(games):
+                break
+            # narrowed like filter_candidates(), the engine only applies the letter counts of the latest feedback
+            candidates &= batch_engine.get_possible_matches(allowed, BatchSearchEngine.encode(previous), codes)
+
+        for i in games:
+            results[i] = {"success": False, "attempts": max_attempts, "target_word": targets[i]}
+        return results
+
+    def get_feedback_code(self, guess: str) -> int:
+        """
+        The feedback for a guess as a base-3 code, see feedbackmatrix: a lookup in the feedback matrix when the
+        pair is in it, otherwise scored directly. In an adversarial game the host picks the feedback instead.
+        """
+        if self.host is not None:
+            code = self.host.respond(guess)
+            self.target_word = self.host.target_word
+            return code
+        matrix = self.model.feedback_matrix
+        if matrix is not None and (guess, self.target_word) in matrix:
+            return matrix.get_code(guess, self.target_word)
+        return score_guess(guess, self.target_word)
+
     def get_feedback(self, guess):
         """
         Returns:
         A list of tuples (letter, status: [0, 1, 2]) representing the feedback for each letter.
         """
-
         # Example feedback format: [('c', '2'), ('a', '0'), ('r', '1'), ('e', '0'), ('s', '2')]
-        feedback = []
-        unmatched_letters = list(self.target_word)
+        return decode_feedback(guess, self.get_feedback_code(guess))
 
-        for idx, letter in enumerate(guess):
-            if letter == self.target_word[idx]:
-                feedback.append((letter, "2"))
-                unmatched_letters[idx] = None
-            else:
-                feedback.append((letter, None))
+    def reset(self, new_word: str) -> None:
+        self.target_word = new_word.strip()
+        self.host = None
+        self.guess = self.opener
+        model = self.model
+        # all_ids is never modified, filter_candidates replaces the candidates instead
+        self.candidates = model.all_ids
+        self.engine = model.engine_class(model.corpus, model.all_words, model.debug, model.engine_index)
+        self.frequencies = model.letter_frequencies.copy() if model.letter_frequencies is not None else None
 
-        for idx, (letter, status) in enumerate(feedback):
-            if status is not None:
-                continue
+    def reset_adversarial(self) -> None:
+        """
+        Starts an Absurdle game: there is no target word, every guess gets the feedback that keeps the most
+        answers possible, so solve() plays the worst case over all answers. target_word is set once it is forced.
+        """
+        assert self.model.feedback_matrix is not None, "adversarial games need the feedback matrix"
+        self.reset("")
+        self.target_word = None
+        self.host = AbsurdleHost(self.model.feedback_matrix)
 
-            if letter in unmatched_letters:
-                feedback[idx] = (letter, "1")
-                unmatched_letters[unmatched_letters.index(letter)] = None
-            else:
-                feedback[idx] = (letter, "0")
 
-        return feedback
+class WordleSolver(GameSession):
+    def __init__(
+        self,
+        debug: bool = False,
+        use_feedback_matrix: bool = True,
+        engine_class=SolverSearchEngine,
+        strategy: str = "cosine",
+        use_opening_book: bool = True,
+        use_snapshot: bool = True,
+        lookahead_depth: int = 3,
+        move_budget: float = 1.0,
+        latency_budget: Optional[float] = None,
+        timing_hook: Optional[Callable[[dict], None]] = None,
+        approximate: bool = False,
+        workers: int = 1,
+        trace: Optional[GameTrace] = None,
+    ):
+        """
+        A WordleModel with a single GameSession on top of it, for playing one game at a time.
+        The arguments are those of WordleModel and GameSession, and the model's attributes can be read
+        straight off the solver. To play concurrent games, share solver.model and give every game model.new_session().
+        """
+        model = WordleModel(
+            debug, use_feedback_matrix, engine_class, strategy, use_opening_book, use_snapshot, lookahead_depth,
+            move_budget, latency_budget, timing_hook, approximate, workers,
+        )
+        super().__init__(model, trace)
 
-    def reset(self, new_word: str) -> None:
-        self.target_word = new_word
-        self.guess = "slate"
-        self.candidates = deepcopy(self.all_words)
-        self.engine = SolverSearchEngine(self.corpus, self.candidates, self.debug)
+    def __getattr__(self, name: str):
+        # only called for attributes the session doesn't have
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)